@@ -0,0 +1,256 @@
+"""
+Benchmark harness -- runs parameterized workloads over every benchmarked module, and records
+    throughput, latency percentiles and peak memory of each as JSON. Given a saved baseline, it
+    compares against it and exits with status 1 if any workload regressed.
+
+Run from any directory with "python3 [path-to-dvs_structures]/dvs_structures/python3/bench/run_all.py"
+    - save a baseline: run_all.py --output baseline.json
+    - check a change against it: run_all.py --baseline baseline.json
+    - see run_all.py --help for the rest
+
+Each workload builds a fresh structure, then times every operation on its own, so that the
+    latency percentiles come from individual calls. Runs are repeated and the fastest one is kept,
+    which filters out most noise from other processes. Peak memory is measured in a separate run,
+    since tracing allocations slows everything down.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src", "union_find"))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src", "van_embde_boas"))
+from UnionFind import UnionFind
+from VEB import VEB
+
+"""
+Generate the VEB workloads -- insert, delete, successor and predecessor, over several universe
+    sizes and key densities
+
+:type n: int -- number of keys, and of timed operations per workload
+:rtype: Iterator[Tuple[string, dict, Callable[[], Callable], List[tuple]]] -- name, parameters,
+            function building the structure and returning the operation to time, and the
+            arguments of each timed call
+"""
+def vebWorkloads(n):
+    for u in (2**16, 2**32, 2**64):
+        for density in ("sparse", "dense"):
+            rand = random.Random(u + n)
+            if density == "sparse":
+                # uniformly random over the universe
+                span = u
+            else:
+                # packed into a window of 8n integers, like ids or timestamps
+                span = min(u, 8*n)
+            keys = [rand.randrange(span) for _ in range(n)]
+            queries = [(rand.randrange(span),) for _ in range(n)]
+            params = {"u": "2^{}".format(u.bit_length() - 1), "density": density, "n": n}
+
+            def emptyVEB(u=u):
+                return VEB(u=u)
+
+            def fullVEB(u=u, keys=keys):
+                veb = VEB(u=u)
+                veb.insertAll(keys)
+                return veb
+
+            shuffled = [(x,) for x in keys]
+            rand.shuffle(shuffled)
+
+            prefix = "veb/u={}/{}/".format(params["u"], density)
+            yield prefix + "insert", params, lambda build=emptyVEB: build().insert, [(x,) for x in keys]
+            yield prefix + "delete", params, lambda build=fullVEB: build().delete, shuffled
+            yield prefix + "successor", params, lambda build=fullVEB: build().successor, queries
+            yield prefix + "predecessor", params, lambda build=fullVEB: build().predecessor, queries
+
+"""
+Generate the UnionFind workloads -- union and find, over random, chain and star edge patterns
+
+:type n: int -- number of elements
+:rtype: Iterator[Tuple[string, dict, Callable[[], Callable], List[tuple]]] -- same as vebWorkloads
+"""
+def unionFindWorkloads(n):
+    rand = random.Random(n)
+    patterns = {
+        "random": [(rand.randrange(n), rand.randrange(n)) for _ in range(n)],
+        # every union joins the growing set to the next element
+        "chain": [(i, i+1) for i in range(n-1)],
+        # every union joins a new element to element 0
+        "star": [(0, i) for i in range(1, n)],
+    }
+    finds = [(rand.randrange(n),) for _ in range(n)]
+
+    for pattern, edges in sorted(patterns.items()):
+        params = {"pattern": pattern, "n": n}
+
+        def joined(edges=edges):
+            uf = UnionFind.fromSize(n)
+            for x, y in edges:
+                uf.union(x, y)
+            return uf
+
+        prefix = "unionfind/{}/".format(pattern)
+        yield prefix + "union", params, lambda: UnionFind.fromSize(n).union, edges
+        yield prefix + "find", params, lambda build=joined: build().find, finds
+
+"""
+Time every call of one run of a workload
+
+:type build: Callable[[], Callable]
+:type args: List[tuple]
+:rtype: List[int] -- nanoseconds taken by each call
+"""
+def timeRun(build, args):
+    op = build()
+    timer = time.perf_counter_ns
+    latencies = []
+    for a in args:
+        start = timer()
+        op(*a)
+        latencies.append(timer() - start)
+    return latencies
+
+"""
+Measure the peak memory allocated while building the structure and running a workload
+
+:type build: Callable[[], Callable]
+:type args: List[tuple]
+:rtype: int -- bytes
+"""
+def peakMemory(build, args):
+    tracemalloc.start()
+    try:
+        op = build()
+        for a in args:
+            op(*a)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+"""
+Run one workload, keeping the fastest of several runs
+
+:type build: Callable[[], Callable]
+:type args: List[tuple]
+:type repeat: int
+:rtype: dict -- ops/sec, p50/p99 latency in microseconds and peak memory in bytes
+"""
+def runWorkload(build, args, repeat):
+    best = None
+    for _ in range(repeat):
+        latencies = timeRun(build, args)
+        if best is None or sum(latencies) < sum(best):
+            best = latencies
+
+    best.sort()
+    return {
+        "ops": len(best),
+        "opsPerSec": len(best) / (sum(best) / 1e9),
+        "p50Us": best[len(best) // 2] / 1e3,
+        "p99Us": best[min(len(best) - 1, len(best) * 99 // 100)] / 1e3,
+        "peakBytes": peakMemory(build, args),
+    }
+
+"""
+Compare results against a baseline, reporting every workload's change
+
+:type results: dict -- results of this run, by workload name
+:type baseline: dict -- results of the baseline run, by workload name
+:type threshold: float -- relative slowdown or memory growth that counts as a regression
+:rtype: List[string] -- names of the regressed workloads
+"""
+def compareResults(results, baseline, threshold):
+    print("\ncomparison against baseline (regression threshold {:.0%})".format(threshold))
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            print("  {:<40} new workload".format(name))
+            continue
+
+        current = results[name]
+        previous = baseline[name]
+        throughput = current["opsPerSec"] / previous["opsPerSec"] - 1
+        p99 = current["p99Us"] / previous["p99Us"] - 1
+        memory = current["peakBytes"] / max(previous["peakBytes"], 1) - 1
+
+        # p99 is too noisy to fail on, so it's only reported
+        regressed = throughput < -threshold or memory > threshold
+        if regressed:
+            regressions.append(name)
+        print("  {:<40} ops/s {:+7.1%}   p99 {:+7.1%}   peak memory {:+7.1%}{}".format(name, throughput, p99, memory, "   REGRESSION" if regressed else ""))
+
+    for name in sorted(set(baseline) - set(results)):
+        print("  {:<40} missing from this run".format(name))
+    return regressions
+
+"""
+Parse the command line arguments
+
+:type argv: List[string]
+:rtype: argparse.Namespace
+"""
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Run the benchmark workloads.")
+    parser.add_argument("--output", help="write the results to this JSON file (e.g. to save a baseline)")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file, exiting with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown or memory growth counted as a regression (default 0.10)")
+    parser.add_argument("--filter", default="", help="only run workloads whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per workload, keeping the fastest (default 3)")
+    parser.add_argument("--quick", action="store_true", help="run smaller workloads, for a fast sanity check")
+    return parser.parse_args(argv)
+
+"""
+Run every selected workload, then save and compare the results as requested
+
+:type argv: List[string]
+:rtype: int -- exit status
+"""
+def main(argv):
+    args = parseArgs(argv)
+    vebKeys, unionFindSize = (2000, 10**4) if args.quick else (20000, 10**5)
+
+    results = {}
+    params = {}
+    print("{:<40} {:>12} {:>10} {:>10} {:>12}".format("workload", "ops/s", "p50 us", "p99 us", "peak KB"))
+    for workloads in (vebWorkloads(vebKeys), unionFindWorkloads(unionFindSize)):
+        for name, workloadParams, build, calls in workloads:
+            if args.filter not in name:
+                continue
+            result = runWorkload(build, calls, args.repeat)
+            results[name] = result
+            params[name] = workloadParams
+            print("{:<40} {:>12.0f} {:>10.2f} {:>10.2f} {:>12.1f}".format(name, result["opsPerSec"], result["p50Us"], result["p99Us"], result["peakBytes"]/1024))
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "repeat": args.repeat,
+            "params": params,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("\nresults written to {}".format(args.output))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != args.quick:
+            print("\nwarning: baseline was run with quick={}, this run with quick={}".format(baseline.get("quick"), args.quick))
+        # workloads left out by the filter aren't missing
+        selected = dict((name, result) for name, result in baseline["results"].items() if args.filter in name)
+        if compareResults(results, selected, args.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""
+Benchmarks for ConcurrentUnionFind class.
+
+Run from any directory with "python3 [path-to-dvs_structures]/dvs_structures/python3/bench/union_find/ConcurrentUnionFindBench.py"
+"""
+
+import os
+import random
+import sys
+import time
+from threading import Lock, Thread
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "union_find"))
+from ConcurrentUnionFind import ConcurrentUnionFind
+from UnionFind import UnionFind
+
+"""
+Run every chunk of pairs through union_fn, one thread per chunk
+
+:type union_fn: Callable[[int, int], void]
+:type chunks: List[List[Tuple[int, int]]]
+:rtype: float -- elapsed seconds
+"""
+def runThreads(union_fn, chunks):
+    def worker(chunk):
+        for x, y in chunk:
+            union_fn(x, y)
+
+    threads = [Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+"""
+Compare union throughput of ConcurrentUnionFind against UnionFind behind one global lock, as the
+    number of threads grows
+
+:type n: int -- number of elements
+:type m: int -- total number of unions, split evenly across threads
+:type threadCounts: List[int]
+"""
+def benchThroughput(n=10**5, m=4*10**5, threadCounts=(1, 2, 4, 8)):
+    print("union throughput over {} elements ({} cpus available)".format(n, os.cpu_count()))
+    rand = random.Random(0)
+    pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(m)]
+
+    for threads in threadCounts:
+        chunks = [pairs[k::threads] for k in range(threads)]
+
+        uf = UnionFind.fromSize(n, validate=False)
+        lock = Lock()
+        def lockedUnion(x, y):
+            with lock:
+                uf.union(x, y)
+        baseline = runThreads(lockedUnion, chunks)
+
+        concurrent = ConcurrentUnionFind.fromSize(n, validate=False)
+        elapsed = runThreads(concurrent.union, chunks)
+
+        print("  threads={:<2} global lock {:10.0f} unions/s   striped {:10.0f} unions/s".format(threads, m/baseline, m/elapsed))
+
+if __name__ == "__main__":
+    benchThroughput()
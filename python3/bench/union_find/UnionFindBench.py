@@ -0,0 +1,278 @@
+"""
+Benchmarks for UnionFind class.
+
+Run from any directory with "python3 [path-to-dvs_structures]/dvs_structures/python3/bench/union_find/UnionFindBench.py"
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "union_find"))
+from UnionFind import UnionFind
+
+"""
+Measure the average cost of a single union call as n grows, with and without input validation
+
+:type sizes: List[int]
+:type calls: int -- number of union calls timed per size
+"""
+def benchValidation(sizes=(10**3, 10**4, 10**5, 10**6), calls=20000):
+    print("union per-call cost (validate=True vs validate=False)")
+    for n in sizes:
+        rand = random.Random(n)
+        xs = [rand.randrange(n) for _ in range(calls)]
+        ys = [rand.randrange(n) for _ in range(calls)]
+
+        for validate in (True, False):
+            uf = UnionFind(list(range(n)), validate=validate)
+            start = time.perf_counter()
+            for x, y in zip(xs, ys):
+                uf.union(x, y)
+            elapsed = time.perf_counter() - start
+            print("  n={:>8} validate={!s:<5} {:8.3f} us/call".format(n, validate, 1e6*elapsed/calls))
+
+"""
+Measure bytes allocated per element for the general constructor over list(range(n)) (including
+    the input list it needs) against UnionFind.fromSize(n)
+
+:type sizes: List[int]
+"""
+def benchDenseMemory(sizes=(10**5, 10**6)):
+    print("memory per element (general vs fromSize)")
+    for n in sizes:
+        for name, build in (("general", lambda: UnionFind(list(range(n)))), ("fromSize", lambda: UnionFind.fromSize(n))):
+            tracemalloc.start()
+            uf = build()
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del uf
+            print("  n={:>8} {:<8} {:8.1f} bytes/element".format(n, name, used/n))
+
+"""
+Compare building the sets of a random graph with a sequential union loop against fromEdges with
+    an increasing number of worker processes (which only run with at least 8 edges per element)
+
+:type n: int -- number of elements
+:type m: int -- number of edges
+:type workerCounts: List[int]
+"""
+def benchFromEdges(n=10**4, m=10**6, workerCounts=(1, 2, 4, 8)):
+    print("building sets from {} edges over {} elements ({} cpus available)".format(m, n, os.cpu_count()))
+    rand = random.Random(0)
+    edges = [(rand.randrange(n), rand.randrange(n)) for _ in range(m)]
+
+    uf = UnionFind.fromSize(n, validate=False)
+    start = time.perf_counter()
+    for x, y in edges:
+        uf.union(x, y)
+    baseline = time.perf_counter() - start
+    print("  union loop          {:8.3f} s".format(baseline))
+
+    for workers in workerCounts:
+        start = time.perf_counter()
+        UnionFind.fromEdges(edges, elements=range(n), workers=workers, validate=False)
+        elapsed = time.perf_counter() - start
+        print("  fromEdges workers={:<2} {:7.3f} s ({:.2f}x)".format(workers, elapsed, baseline/elapsed))
+
+"""
+Measure how long it takes to get a saved datastructure back, with and without memory mapping
+
+:type n: int -- number of elements
+"""
+def benchLoad(n=10**7):
+    print("loading a saved fromSize({}) datastructure".format(n))
+    uf = UnionFind.fromSize(n, validate=False)
+    uf.unionMany(range(0, n-1, 2), range(1, n, 2))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "uf.bin")
+        uf.save(path)
+        del uf
+
+        for useMmap in (True, False):
+            start = time.perf_counter()
+            loaded = UnionFind.load(path, useMmap=useMmap)
+            elapsed = time.perf_counter() - start
+            print("  useMmap={!s:<5} {:10.3f} ms".format(useMmap, 1e3*elapsed))
+            del loaded
+
+"""
+Compare the cost of union and find with metrics disabled and enabled, alternating the two and
+    taking the best of several runs
+
+:type n: int -- number of elements
+:type calls: int -- number of union calls, then of find calls
+:type runs: int
+"""
+def benchMetrics(n=10**5, calls=10**5, runs=5):
+    print("per-call cost with metrics disabled vs enabled, n={}".format(n))
+    rand = random.Random(n)
+    pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(calls)]
+    finds = [rand.randrange(n) for _ in range(calls)]
+
+    best = {}
+    for _ in range(runs):
+        for enabled in (False, True):
+            uf = UnionFind.fromSize(n)
+            if enabled:
+                uf.enableMetrics()
+
+            start = time.perf_counter()
+            for x, y in pairs:
+                uf.union(x, y)
+            middle = time.perf_counter()
+            for x in finds:
+                uf.find(x)
+            end = time.perf_counter()
+
+            union_time, find_time = best.get(enabled, (middle - start, end - middle))
+            best[enabled] = (min(union_time, middle - start), min(find_time, end - middle))
+
+    print("  union {:5.2f} vs {:5.2f} us   find {:5.2f} vs {:5.2f} us".format(1e6*best[False][0]/calls, 1e6*best[True][0]/calls, 1e6*best[False][1]/calls, 1e6*best[True][1]/calls))
+
+"""
+Generate the union patterns for benchStrategies, each as a list of pairs over {0, 1, ... n-1}
+
+:type n: int -- number of elements, a power of 2
+:rtype: dict -- pairs by pattern name
+"""
+def strategyPatterns(n):
+    rand = random.Random(n)
+    patterns = {
+        "random": [(rand.randrange(n), rand.randrange(n)) for _ in range(n)],
+        # every union joins the growing set to the next element
+        "chain": [(i, i+1) for i in range(n-1)],
+        # every union joins a new element to element 0
+        "star": [(0, i) for i in range(1, n)],
+    }
+
+    # unions of equal sized sets, level by level -- the deepest trees linking by size or rank
+    #   allows (lg(n) levels), with every find starting from its leaves
+    binomial = []
+    step = 1
+    while step < n:
+        binomial.extend((i, i + step) for i in range(0, n, 2*step))
+        step *= 2
+    patterns["binomial"] = binomial
+    return patterns
+
+"""
+Compare union and find throughput of every compression and linking strategy across adversarial
+    union patterns. Finds run in reverse element order after all unions, which starts them from
+    the deepest nodes of the binomial pattern. Rollback mode (no compression) is included as a
+    baseline
+
+:type n: int -- number of elements, a power of 2
+:type runs: int -- best of this many runs per strategy
+"""
+def benchStrategies(n=2**17, runs=3):
+    print("union then find throughput by strategy, n={}".format(n))
+    strategies = [(compression, linking, False) for compression in ("full", "halving", "splitting") for linking in ("size", "rank")]
+    strategies.append(("full", "size", True))
+    finds = list(range(n-1, -1, -1))
+
+    for pattern, pairs in sorted(strategyPatterns(n).items()):
+        print("  {} ({} unions)".format(pattern, len(pairs)))
+        for compression, linking, rollback in strategies:
+            best_union = best_find = None
+            for _ in range(runs):
+                uf = UnionFind.fromSize(n, validate=False, rollback=rollback, compression=compression, linking=linking)
+                union = uf.union
+                find = uf.find
+
+                start = time.perf_counter()
+                for x, y in pairs:
+                    union(x, y)
+                middle = time.perf_counter()
+                for x in finds:
+                    find(x)
+                end = time.perf_counter()
+
+                if best_union is None or middle - start < best_union:
+                    best_union = middle - start
+                if best_find is None or end - middle < best_find:
+                    best_find = end - middle
+
+            name = "rollback (none)/size" if rollback else "{}/{}".format(compression, linking)
+            print("    {:<21} union {:10.0f} ops/s   find {:10.0f} ops/s".format(name, len(pairs)/best_union, n/best_find))
+
+"""
+Obtain the memory this process has written to since it was forked (its private dirty pages), in
+    bytes. Linux only
+
+:rtype: int, or None if not available
+"""
+def privateDirtyBytes():
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return 1024 * sum(int(line.split()[1]) for line in f if line.startswith("Private_Dirty"))
+    except OSError:
+        return None
+
+"""
+Worker for benchFreeze -- finds every element of the datastructure inherited from the parent
+    process, and reports how much memory that copied
+
+:type _: Undefined
+:rtype: int, or None if not available
+"""
+def findAllInForked(_):
+    before = privateDirtyBytes()
+    for x in range(len(forkedUnionFind.parent)):
+        forkedUnionFind.find(x)
+    after = privateDirtyBytes()
+    if before is None:
+        return None
+    return after - before
+
+"""
+Measure the cost of freeze, find throughput before and after it, and the memory copied by a forked
+    worker that finds every element
+
+:type n: int -- number of elements
+"""
+def benchFreeze(n=10**6):
+    global forkedUnionFind
+    print("freezing fromSize({}) after n random unions (rollback=True keeps the paths uncompressed)".format(n))
+    rand = random.Random(n)
+    xs = [rand.randrange(n) for _ in range(n)]
+    ys = [rand.randrange(n) for _ in range(n)]
+    queries = [rand.randrange(n) for _ in range(n)]
+
+    for rollback in (False, True):
+        timings = []
+        for frozen in (False, True):
+            uf = UnionFind.fromSize(n, rollback=rollback)
+            uf.unionMany(xs, ys)
+            if frozen:
+                start = time.perf_counter()
+                uf.freeze()
+                timings.append("freeze {:6.3f} s".format(time.perf_counter() - start))
+
+            start = time.perf_counter()
+            for x in queries:
+                uf.find(x)
+            timings.append("find {} {:5.2f} us".format("frozen" if frozen else "before", 1e6*(time.perf_counter() - start)/n))
+
+            if "fork" in multiprocessing.get_all_start_methods():
+                forkedUnionFind = uf
+                with multiprocessing.get_context("fork").Pool(1) as pool:
+                    copied = pool.map(findAllInForked, [None])[0]
+                if copied is not None:
+                    timings.append("forked worker copied {:6.1f} MB".format(copied / 2**20))
+                forkedUnionFind = None
+        print("  rollback={!s:<5} {}".format(rollback, "   ".join(timings)))
+
+if __name__ == "__main__":
+    benchValidation()
+    benchDenseMemory()
+    benchFromEdges()
+    benchLoad()
+    benchMetrics()
+    benchFreeze()
+    benchStrategies()
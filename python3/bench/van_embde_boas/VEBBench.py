@@ -0,0 +1,294 @@
+"""
+Benchmarks for VEB class.
+
+Run from any directory with "python3 [path-to-dvs_structures]/dvs_structures/python3/bench/van_embde_boas/VEBBench.py"
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "van_embde_boas"))
+from VEB import VEB
+
+"""
+Measure the average cost of each hot operation over random keys
+
+:type us: List[int] -- universe sizes to benchmark
+:type n: int -- number of keys inserted, then queried, then deleted
+"""
+def benchOperations(us=(2**16, 2**32, 2**64), n=20000):
+    print("per-operation cost over {} random keys".format(n))
+    for u in us:
+        rand = random.Random(u)
+        keys = [rand.randrange(u) for _ in range(n)]
+        veb = VEB(u=u)
+
+        timings = []
+        for name, op in (("insert", veb.insert), ("successor", veb.successor), ("predecessor", veb.predecessor), ("delete", veb.delete)):
+            start = time.perf_counter()
+            for x in keys:
+                op(x)
+            timings.append("{} {:6.2f} us".format(name, 1e6*(time.perf_counter() - start)/n))
+        print("  u=2^{:<3} {}".format(u.bit_length() - 1, "   ".join(timings)))
+
+"""
+Compare the cost of each hot operation with and without validating its input, taking the best of
+    several runs since the difference is small next to timing noise
+
+:type us: List[int] -- universe sizes to benchmark
+:type leafSizes: List[int]
+:type n: int -- number of keys inserted, then queried, then deleted
+:type runs: int
+"""
+def benchValidation(us=(2**32, 2**64), leafSizes=(1, 256), n=20000, runs=3):
+    print("per-operation cost with validate=True vs validate=False over {} random keys".format(n))
+    for leafSize in leafSizes:
+        for u in us:
+            rand = random.Random(u)
+            keys = [rand.randrange(u) for _ in range(n)]
+
+            timings = []
+            for name in ("insert", "successor", "predecessor", "delete"):
+                best = {}
+                for validate in (True, False):
+                    for _ in range(runs):
+                        veb = VEB(u=u, leafSize=leafSize, validate=validate)
+                        if name != "insert":
+                            veb.insertAll(keys)
+                        op = getattr(veb, name)
+
+                        start = time.perf_counter()
+                        for x in keys:
+                            op(x)
+                        elapsed = time.perf_counter() - start
+                        best[validate] = min(best.get(validate, elapsed), elapsed)
+                timings.append("{} {:5.2f} vs {:5.2f} us".format(name, 1e6*best[True]/n, 1e6*best[False]/n))
+
+            print("  leafSize={:<4} u=2^{:<3} {}".format(leafSize, u.bit_length() - 1, "   ".join(timings)))
+
+"""
+Compare the cost of each hot operation with statistics disabled and enabled, alternating the two
+    and taking the best of several runs
+
+:type u: int
+:type n: int -- number of keys inserted, then queried, then deleted
+:type runs: int
+"""
+def benchStats(u=2**32, n=20000, runs=5):
+    print("per-operation cost with stats disabled vs enabled over {} random keys, u=2^{}".format(n, u.bit_length() - 1))
+    rand = random.Random(u)
+    keys = [rand.randrange(u) for _ in range(n)]
+
+    timings = []
+    for name in ("insert", "successor", "predecessor", "delete"):
+        best = {}
+        for _ in range(runs):
+            for enabled in (False, True):
+                veb = VEB(u=u)
+                if name != "insert":
+                    veb.insertAll(keys)
+                if enabled:
+                    veb.enableStats()
+                op = getattr(veb, name)
+
+                start = time.perf_counter()
+                for x in keys:
+                    op(x)
+                elapsed = time.perf_counter() - start
+                best[enabled] = min(best.get(enabled, elapsed), elapsed)
+        timings.append("{} {:5.2f} vs {:5.2f} us".format(name, 1e6*best[False]/n, 1e6*best[True]/n))
+    print("  {}".format("   ".join(timings)))
+
+"""
+Count the objects (VEB nodes and bitset leaves) making up a structure
+
+:type veb: VEB
+:rtype: int
+"""
+def countNodes(veb):
+    count = 1
+    if not isinstance(veb, VEB):
+        return count
+    if veb.summary is not None:
+        count += countNodes(veb.summary)
+    for cluster in veb.cluster.values():
+        count += countNodes(cluster)
+    return count
+
+"""
+Measure memory and object count of sparse sets of random keys
+
+:type u: int
+:type ns: List[int] -- numbers of keys to store
+"""
+def benchMemory(u=2**64, ns=(1000, 10000)):
+    print("memory of sparse sets over u=2^{}".format(u.bit_length() - 1))
+    for n in ns:
+        rand = random.Random(n)
+        keys = [rand.randrange(u) for _ in range(n)]
+
+        tracemalloc.start()
+        veb = VEB(u=u)
+        veb.insertAll(keys)
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("  n={:>6} {:8.0f} bytes/key {:6.1f} nodes/key".format(n, used/n, countNodes(veb)/n))
+
+"""
+Measure memory, object count and per-operation cost across leaf sizes (leafSize = 1 keeps the
+    full recursion down to u = 2)
+
+:type u: int
+:type n: int -- number of keys inserted, then queried, then deleted
+:type leafSizes: List[int]
+:type patterns: List[string] -- "sparse" for uniformly random keys, "dense" for keys packed
+                                into a window of 8n integers
+"""
+def benchLeafSizes(u=2**32, n=50000, leafSizes=(1, 16, 256, 2**16), patterns=("sparse", "dense")):
+    print("leaf sizes over {} keys, u=2^{}".format(n, u.bit_length() - 1))
+    for pattern in patterns:
+        rand = random.Random(n)
+        if pattern == "sparse":
+            keys = [rand.randrange(u) for _ in range(n)]
+        else:
+            keys = [rand.randrange(8*n) for _ in range(n)]
+
+        for leafSize in leafSizes:
+            tracemalloc.start()
+            veb = VEB(u=u, leafSize=leafSize)
+            veb.insertAll(keys)
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            nodes = countNodes(veb)
+
+            veb = VEB(u=u, leafSize=leafSize)
+            timings = []
+            for name, op in (("insert", veb.insert), ("successor", veb.successor), ("predecessor", veb.predecessor), ("delete", veb.delete)):
+                start = time.perf_counter()
+                for x in keys:
+                    op(x)
+                timings.append("{} {:5.2f} us".format(name, 1e6*(time.perf_counter() - start)/n))
+
+            print("  {:<6} leafSize={:<6} {:6.0f} bytes/key {:5.2f} nodes/key   {}".format(pattern, leafSize, used/n, nodes/n, "   ".join(timings)))
+
+"""
+Compare loading sorted keys with fromSorted against insertAll
+
+:type u: int
+:type ns: List[int] -- numbers of keys to load (10^7 keys needs several GB of memory)
+"""
+def benchLoad(u=2**32, ns=(10**5, 10**6)):
+    print("loading sorted keys over u=2^{}".format(u.bit_length() - 1))
+    for n in ns:
+        rand = random.Random(n)
+        for pattern in ("sparse", "dense"):
+            if pattern == "sparse":
+                keys = sorted(rand.sample(range(u), n))
+            else:
+                # timestamp-like -- increasing, with small random gaps
+                keys = []
+                t = rand.randrange(u // 2)
+                for _ in range(n):
+                    t += rand.randrange(1, 16)
+                    keys.append(t)
+            benchLoadKeys(u, keys, pattern)
+
+"""
+Time insertAll against fromSorted on one list of sorted keys
+
+:type u: int
+:type keys: List[int]
+:type pattern: string -- description of the keys
+"""
+def benchLoadKeys(u, keys, pattern):
+    start = time.perf_counter()
+    veb = VEB(u=u)
+    veb.insertAll(keys)
+    incremental = time.perf_counter() - start
+    del veb
+
+    start = time.perf_counter()
+    veb = VEB.fromSorted(keys, u=u)
+    bulk = time.perf_counter() - start
+    del veb
+
+    print("  n={:>8} {:<6} insertAll {:7.2f} s   fromSorted {:7.2f} s ({:.1f}x)".format(len(keys), pattern, incremental, bulk, incremental/bulk))
+
+"""
+Compare scanning a range with iterRange against repeated successor calls
+
+:type u: int
+:type n: int -- number of random keys stored
+:type windows: List[int] -- numbers of keys covered by each scanned range
+"""
+def benchRange(u=2**32, n=10**5, windows=(10, 1000, 100000)):
+    print("scanning ranges of {} random keys over u=2^{}".format(n, u.bit_length() - 1))
+    rand = random.Random(0)
+    keys = sorted(rand.sample(range(u), n))
+    veb = VEB.fromSorted(keys, u=u)
+
+    for k in windows:
+        lo = keys[(n - k) // 2]
+        hi = keys[(n - k) // 2 + k - 1] + 1
+
+        start = time.perf_counter()
+        found = []
+        # lo is a stored key, so the scan starts there
+        x = lo
+        while x != -1 and x < hi:
+            found.append(x)
+            x = veb.successor(x)
+        stepped = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = list(veb.iterRange(lo, hi))
+        walked = time.perf_counter() - start
+
+        assert (found == scanned)
+        print("  k={:>6} successor loop {:8.2f} us/key   iterRange {:8.2f} us/key ({:.1f}x)".format(k, 1e6*stepped/k, 1e6*walked/k, stepped/walked))
+
+"""
+Compare throughput of successorMany/predecessorMany against a loop of scalar calls on sorted
+    query batches
+
+:type u: int
+:type n: int -- number of random keys stored
+:type m: int -- number of queries per batch
+:type spreads: List[int] -- width of the window the queries are drawn from, as a fraction of u
+"""
+def benchBatchedQueries(u=2**32, n=10**5, m=10**5, spreads=(1, 2**8, 2**16)):
+    print("batches of {} sorted queries over {} random keys, u=2^{}".format(m, n, u.bit_length() - 1))
+    rand = random.Random(0)
+    veb = VEB.fromSorted(sorted(rand.sample(range(u), n)), u=u)
+
+    for spread in spreads:
+        window = u // spread
+        lo = rand.randrange(u - window + 1)
+        xs = sorted(lo + rand.randrange(window) for _ in range(m))
+
+        timings = []
+        for name, scalar, batched in (("successor", veb.successor, veb.successorMany), ("predecessor", veb.predecessor, veb.predecessorMany)):
+            start = time.perf_counter()
+            expected = [scalar(x) for x in xs]
+            loop = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = batched(xs)
+            batch = time.perf_counter() - start
+
+            assert (expected == results)
+            timings.append("{} {:9.0f} vs {:9.0f} queries/s ({:.1f}x)".format(name, m/loop, m/batch, loop/batch))
+        print("  window=u/{:<6} {}".format(spread, "   ".join(timings)))
+
+if __name__ == "__main__":
+    benchOperations()
+    benchValidation()
+    benchStats()
+    benchMemory()
+    benchLeafSizes()
+    benchLoad()
+    benchRange()
+    benchBatchedQueries()
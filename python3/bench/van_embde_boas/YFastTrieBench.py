@@ -0,0 +1,54 @@
+"""
+Benchmarks comparing YFastTrie against VEB on the same workloads.
+
+Run from any directory with "python3 [path-to-dvs_structures]/dvs_structures/python3/bench/van_embde_boas/YFastTrieBench.py"
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "van_embde_boas"))
+from VEB import VEB
+from YFastTrie import YFastTrie
+
+"""
+Measure memory per key and per-operation latency of both structures over random sparse keys
+
+:type u: int
+:type ns: List[int] -- numbers of keys to store
+"""
+def benchCompare(u=2**64, ns=(10**4, 10**5)):
+    print("YFastTrie vs VEB over u=2^{}".format(u.bit_length() - 1))
+    for n in ns:
+        rand = random.Random(n)
+        keys = [rand.randrange(u) for _ in range(n)]
+        queries = [rand.randrange(u) for _ in range(n)]
+
+        for cls in (VEB, YFastTrie):
+            tracemalloc.start()
+            start = time.perf_counter()
+            ds = cls(u=u)
+            ds.insertAll(keys)
+            insert_time = time.perf_counter() - start
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            timings = ["insert {:6.2f} us".format(1e6*insert_time/n)]
+            for name, op in (("successor", ds.successor), ("predecessor", ds.predecessor)):
+                start = time.perf_counter()
+                for q in queries:
+                    op(q)
+                timings.append("{} {:6.2f} us".format(name, 1e6*(time.perf_counter() - start)/n))
+
+            start = time.perf_counter()
+            for x in keys:
+                ds.delete(x)
+            timings.append("delete {:6.2f} us".format(1e6*(time.perf_counter() - start)/n))
+
+            print("  n={:>7} {:<9} {:6.0f} bytes/key   {}".format(n, cls.__name__, used/n, "   ".join(timings)))
+
+if __name__ == "__main__":
+    benchCompare()
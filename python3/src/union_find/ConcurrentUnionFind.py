@@ -0,0 +1,201 @@
+"""
+Python implementation of a thread-safe UnionFind datastructure. Solves disjoint set problem, with
+    find and union callable from many threads at once.
+
+find never takes a lock: it uses path halving, where each visited id is re-pointed at its
+    grandparent. A non-root id never becomes a root again and its ancestors never change, so
+    re-pointing it at any ancestor it has seen is always safe, even when two threads race.
+
+union finds both roots without locking, then locks only the two stripes (out of NUM_STRIPES)
+    that the roots hash to, checks that both are still roots (retrying if another thread attached
+    either of them in the meantime) and links them by size. Unions on unrelated sets rarely
+    contend for the same lock.
+
+* Let n be the number of elements in the datastructure
+
+Runtimes:
+    - same as UnionFind (per thread, not counting time spent waiting on locks)
+
+Space:
+    - O(n)
+
+* find, union, findMany, unionMany, getSize and getNumSets are safe to call concurrently. The
+    other methods (add, getMembers, save, ...) must not run concurrently with any other call
+* Rollback mode and metrics (see UnionFind.enableMetrics) are not supported
+* The compression and linking strategies aren't selectable: find always uses path halving, and
+    union always links by size
+"""
+from threading import Lock
+from UnionFind import UnionFind
+
+class ConcurrentUnionFind(UnionFind):
+    # number of locks that roots are spread across
+    NUM_STRIPES = 64
+
+    """
+    Sets up thread-safe Union-Find data structure
+
+    :type elements: List[Undefined], where each element is a unique hashable object
+    :type validate: bool -- same as UnionFind
+    """
+    def __init__(self, elements, validate=True):
+        super().__init__(elements, validate=validate)
+
+    """
+    Sets up thread-safe Union-Find data structure over the integers {0, 1, ... n-1}
+
+    :type n: int -- number of elements
+    :type validate: bool -- same as UnionFind.fromSize
+    :rtype: ConcurrentUnionFind
+    """
+    @classmethod
+    def fromSize(cls, n, validate=True):
+        return super().fromSize(n, validate=validate)
+
+    """
+    Reads a datastructure written by save (see UnionFind.load)
+
+    :type path: string
+    :type useMmap: bool
+    :type validate: bool
+    :rtype: ConcurrentUnionFind
+    """
+    @classmethod
+    def load(cls, path, useMmap=True, validate=True):
+        uf = super().load(path, useMmap=useMmap, validate=validate)
+        uf._initLocks()
+        return uf
+
+    """
+    Sets up the forest of n singleton groups over ids {0, 1, ... n-1}, and the locks guarding it
+
+    :type n: int
+    :rtype: void
+    """
+    def _initForest(self, n):
+        super()._initForest(n)
+        self._initLocks()
+
+    """
+    Selects the strategies of UnionFind, except that root lookups always use the lock-free path
+        halving of _findRoot (getSize and sameSet go through _rootOf)
+
+    :type compression: string
+    :type linking: string
+    :rtype: void
+    """
+    def _initStrategy(self, compression, linking):
+        super()._initStrategy(compression, linking)
+        self._rootOf = self._findRoot
+
+    """
+    Sets up the striped root locks, and the lock guarding the set count and root set
+
+    :rtype: void
+    """
+    def _initLocks(self):
+        self.locks = [Lock() for _ in range(self.NUM_STRIPES)]
+        self.setsLock = Lock()
+
+    """
+    Unions the sets of two distinct elements
+
+    :type x: Undefined -- x must be an element of the constructor input list
+    :type y: Undefined -- y must be an element of the constructor input list
+    :rtype: void
+    """
+    def union(self, x, y):
+        # check for valid input
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+            validInput, err_msg = self._validX(y)
+            assert (validInput), err_msg
+
+        self._unionPair(self.map[x], self.map[y])
+
+    """
+    Obtains the representative element of the set corresponding to the given element
+
+    :type x: Undefined -- x must be an element of the constructor input list
+    :rtype: Undefined -- an element of the constructor input list
+    """
+    def find(self, x):
+        # check for valid input
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        return self.elements[self._findRoot(self.map[x])]
+
+    """
+    Unions the sets of each pair of ids (x_ids[k], y_ids[k]), in order
+
+    :type x_ids: Iterable[int]
+    :type y_ids: Iterable[int]
+    :rtype: void
+    """
+    def _unionIds(self, x_ids, y_ids):
+        for x_id, y_id in zip(x_ids, y_ids):
+            self._unionPair(x_id, y_id)
+
+    """
+    Unions the sets of two ids, locking only the stripes of their two roots
+
+    :type x_id: int
+    :type y_id: int
+    :rtype: void
+    """
+    def _unionPair(self, x_id, y_id):
+        parent = self.parent
+        counts = self.counts
+        nxt = self.next
+
+        while True:
+            rx = self._findRoot(x_id)
+            ry = self._findRoot(y_id)
+            if rx == ry:
+                return
+
+            # always lock stripes in increasing order, so two unions never wait on each other
+            first, second = sorted((rx % self.NUM_STRIPES, ry % self.NUM_STRIPES))
+            self.locks[first].acquire()
+            if second != first:
+                self.locks[second].acquire()
+            try:
+                # another thread may have attached either root elsewhere while we were finding
+                #   or waiting -- if so, start over from the new roots
+                if parent[rx] != rx or parent[ry] != ry:
+                    continue
+
+                # merge smaller group into larger group, breaking ties exactly as UnionFind does
+                if counts[rx] < counts[ry]:
+                    rx, ry = ry, rx
+                counts[rx] += counts[ry]
+                nxt[rx], nxt[ry] = nxt[ry], nxt[rx]
+
+                # attach last, so that lock-free readers only ever see a finished merge
+                parent[ry] = rx
+
+                with self.setsLock:
+                    self.numSets -= 1
+                    if self.roots is not None:
+                        self.roots.discard(self.elements[ry])
+                return
+            finally:
+                if second != first:
+                    self.locks[second].release()
+                self.locks[first].release()
+
+    """
+    Obtains the root id of the given id, with path halving and without locking
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _findRoot(self, x_id):
+        parent = self.parent
+        while parent[x_id] != x_id:
+            parent[x_id] = parent[parent[x_id]]
+            x_id = parent[x_id]
+        return x_id
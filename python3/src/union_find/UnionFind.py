@@ -12,24 +12,110 @@ Let alpha be the inverse Ackermann function (https://en.wikipedia.org/wiki/Acker
 Runtimes:
     - union: O(alpha(n)) amortized
     - find: O(alpha(n)) amortized
-    - getRoots: O(1)
+    - getRoots: O(#sets) -- copies every root
     - getSize: O(1)
-    - getRootSizes: O(1)
+    - getRootSizes: O(#sets) -- copies every root and its size
+    - iterRoots: O(1) to create, O(1) per root visited
+    - getRootSizesView: O(1) to create, O(1) per lookup or root visited
+    - getNumSets: O(1)
+    - getMembers: O(size of the set)
+    - iterSets: O(n) for a full pass, without calling find
+    - unionMany: O(k * alpha(n)) amortized, where k is the number of pairs
+    - findMany: O(k * alpha(n)) amortized, where k is the number of queried elements
+    - add: O(1) amortized
+    - addMany: O(k) amortized, where k is the number of added elements
+    - fromEdges: O(m * alpha(n)), where m is the number of edges. With w > 1 worker processes
+        (and at least 8 edges per element), the calling process only spends O(m) translating
+        elements into ids and O(n) applying the merged forest, and the workers' longest chain of
+        work is O(m * alpha(n) / w + n * lg(w))
+    - save: O(n)
+    - load: O(1) if built with fromSize and memory mapped, O(n) otherwise (the element table has to
+        be decoded and the id map rebuilt)
+    - snapshot: O(1)
+    - rollback: O(k), where k is the number of merging unions undone
+    - enableMetrics/disableMetrics: O(1)
+    - getMetrics: O(#sets), or O(n) if built with fromSize
+    - sameSet: O(alpha(n)) amortized
+    - freeze: O(n * lg(lg(n))) -- pointer jumping halves every path per O(n) pass, and linking
+        by size or rank keeps paths O(lg(n)) long
+    - find and sameSet once frozen: O(1) worst case
 
 Space:
     - O(n)
+
+* If the elements are exactly the integers {0, 1, ... n-1}, build the datastructure with
+    UnionFind.fromSize(n) instead. Elements then double as their own ids, so no element table,
+    id map or root set is stored (only the integer arrays), and getRoots/getRootSizes
+    take O(n) instead, as does a full pass over iterRoots/getRootSizesView
+
+* find and union compress the paths they walk with full path compression and link by size by
+    default. Path halving or path splitting (a single pass instead of two) and linking by rank
+    can be selected instead, with the compression and linking arguments of the constructor and
+    fromSize -- every combination keeps the same runtimes. A datastructure read with load always
+    uses the defaults
+
+* If built with rollback=True, unions can be undone with snapshot/rollback. Path compression is
+    then turned off (it can't be undone), so find and union take O(lg(n)) instead, which linking
+    by size or rank still guarantees
+
+* Once the sets are final, freeze() flattens the forest so every element points directly at its
+    representative, and makes the datastructure read-only. find and sameSet are then a single
+    array lookup each and never write, so a frozen datastructure can be shared with forked worker
+    processes without any of its arrays being copied
+
+* With metrics enabled, find, union, findMany and unionMany also record the length of every path
+    they walk and how many parent pointers path compression rewrote, which makes them several
+    times slower. A datastructure that never enables metrics runs exactly the same code as before
 """
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from mmap import mmap, ACCESS_COPY
+from operator import itemgetter
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+import os
+import pickle
+import struct
+import sys
+
+# file header for save/load: magic, flags, n, number of sets, element table size in bytes
+_FILE_HEADER = struct.Struct("<4sIqqq")
+_FILE_MAGIC = b"UFv1"
+_FLAG_DENSE = 1
+_FLAG_BIG_ENDIAN = 2
+
+# fewest edges per element for which fromEdges uses worker processes
+_PARALLEL_EDGES_PER_ELEMENT = 8
+
 class UnionFind(object):
     """
     Sets up Union-Find data structure
 
     :type elements: List[Undefined], where each element is a unique hashable object
+    :type validate: bool -- if False, inputs are trusted to be elements of the constructor
+                            input list and membership is never checked
+    :type rollback: bool -- if True, log every union so that it can be undone (see rollback)
+    :type compression: string -- how find and union shorten the paths they walk (unionMany always
+                                 uses path halving, and rollback mode never compresses):
+                                 - "full": two passes, pointing every node on the path at the root
+                                 - "halving": one pass, pointing every other node at its grandparent
+                                 - "splitting": one pass, pointing every node at its grandparent
+    :type linking: string -- which root union attaches under the other:
+                             - "size": the root of the smaller set
+                             - "rank": the root of lower rank (an upper bound on its height),
+                               which needs an extra integer per element
     """
-    def __init__(self, elements):
+    def __init__(self, elements, validate=True, rollback=False, compression="full", linking="size"):
+        validInput, err_msg = self._validStrategy(compression, linking)
+        assert (validInput), err_msg
         n = len(elements)
 
-        # save the elements for return
-        self.elements = elements
+        # check membership of inputs on each call (O(1) lookup in self.map)
+        self.validate = validate
+
+        # save the elements for return (copied, since elements may be added later)
+        self.elements = list(elements)
 
         # maintain all the roots
         self.roots = set(elements)
@@ -39,11 +125,355 @@ class UnionFind(object):
         for i, el in enumerate(elements):
             self.map[el] = i
 
+        self._initForest(n)
+
+        # ids attached under another root by each merging union, oldest first (only in rollback mode)
+        self.history = [] if rollback else None
+
+        # counters of finds and unions (only while metrics are enabled, see enableMetrics)
+        self.metrics = None
+
+        self._initStrategy(compression, linking)
+
+    """
+    Sets up Union-Find data structure over the integers {0, 1, ... n-1}, where each integer is
+        its own id. Supports every method of the general datastructure
+
+    :type n: int -- number of elements
+    :type validate: bool -- if False, inputs are trusted to be in the range 0...n-1
+    :type rollback: bool -- same as the constructor
+    :type compression: string -- same as the constructor
+    :type linking: string -- same as the constructor
+    :rtype: UnionFind
+    """
+    @classmethod
+    def fromSize(cls, n, validate=True, rollback=False, compression="full", linking="size"):
+        uf = cls.__new__(cls)
+        validInput, err_msg = uf._validStrategy(compression, linking)
+        assert (validInput), err_msg
+
+        uf.validate = validate
+
+        # every element is its own id, so translating in either direction is indexing a range
+        uf.elements = range(n)
+        uf.map = range(n)
+
+        # roots are read off self.parent on demand instead of being maintained in a set
+        uf.roots = None
+
+        uf._initForest(n)
+        uf.history = [] if rollback else None
+        uf.metrics = None
+        uf._initStrategy(compression, linking)
+        return uf
+
+    """
+    Adds a new element to the datastructure, in its own singleton set
+
+    :type x: Undefined -- x must be a hashable object not already in the datastructure
+                          (if built with fromSize, x must be the next integer n)
+    :rtype: void
+    """
+    def add(self, x):
+        self._ensureGrowable()
+        x_id = len(self.parent)
+
+        if type(self.map) is range:
+            if self.validate:
+                assert type(x) is int and x == x_id, "expected next element to be {}, got {}".format(x_id, x)
+            self.elements = self.map = range(x_id+1)
+        else:
+            if self.validate:
+                assert x not in self.map, "{} is already an element of the datastructure".format(x)
+            self.elements.append(x)
+            self.map[x] = x_id
+            self.roots.add(x)
+
+        # the backing arrays grow geometrically, so appends are amortized O(1)
+        self.parent.append(x_id)
+        self.counts.append(1)
+        self.next.append(x_id)
+        if self.ranks is not None:
+            self.ranks.append(0)
+        self.numSets += 1
+
+    """
+    Adds new elements to the datastructure, each in its own singleton set
+
+    :type xs: Iterable[Undefined] -- distinct hashable objects not already in the datastructure
+                                     (if built with fromSize, xs must be the next integers n, n+1, ...)
+    :rtype: void
+    """
+    def addMany(self, xs):
+        self._ensureGrowable()
+        xs = list(xs)
+        n = len(self.parent)
+        k = len(xs)
+        ids = range(n, n+k)
+
+        if type(self.map) is range:
+            if self.validate:
+                assert xs == list(ids), "expected next elements to be {}...{}".format(n, n+k-1)
+            self.elements = self.map = range(n+k)
+        else:
+            if self.validate:
+                assert len(set(xs)) == k, "elements to add must be distinct"
+                assert self.map.keys().isdisjoint(xs), "elements to add must not already be in the datastructure"
+            self.elements.extend(xs)
+            self.map.update(zip(xs, ids))
+            self.roots.update(xs)
+
+        self.parent.extend(ids)
+        self.counts.extend(array('q', [1])*k)
+        self.next.extend(ids)
+        if self.ranks is not None:
+            self.ranks.extend(array('q', [0])*k)
+        self.numSets += k
+
+    """
+    Sets up Union-Find data structure with the sets given by the connected components of a graph
+
+    With workers > 1, the edges are split into one chunk per worker process. Each worker compacts
+        its chunk into a flat forest -- one (child, root) pair per id its edges attached under
+        another, so never more than min(m / w, n - 1) pairs, in memory proportional to the chunk.
+        The forests are then merged pairwise by the workers, halving their number each round, and
+        the single remaining forest is attached directly, without any unions. With fewer than 8
+        edges per element, the edges are unioned in the calling process instead, since merging
+        forests of up to n - 1 pairs then costs about as much as unioning the edges
+
+    :type edges: Iterable[Tuple[Undefined, Undefined]] -- each endpoint must be an element
+    :type elements: List[Undefined] -- unique hashable objects. If None, the elements are the
+                                       endpoints of the edges, in order of first appearance. If
+                                       range(n), the datastructure is built with fromSize(n)
+    :type workers: int -- number of worker processes
+    :type validate: bool -- same as the constructor
+    :rtype: UnionFind
+    """
+    @classmethod
+    def fromEdges(cls, edges, elements=None, workers=1, validate=True):
+        edges = list(edges)
+        if elements is None:
+            elements = list(dict.fromkeys(x for edge in edges for x in edge))
+
+        if type(elements) is range and elements == range(len(elements)):
+            uf = cls.fromSize(len(elements), validate=validate)
+        else:
+            uf = cls(elements, validate=validate)
+
+        if not edges:
+            return uf
+
+        x_ids = uf._toIds(map(itemgetter(0), edges))
+        y_ids = uf._toIds(map(itemgetter(1), edges))
+
+        # the merged forests hold up to n - 1 pairs however the edges are split, so workers only
+        #   pay off once the edges outnumber the elements several times over
+        if workers <= 1 or len(edges) < _PARALLEL_EDGES_PER_ELEMENT * len(uf.parent):
+            uf._unionIds(x_ids, y_ids)
+            return uf
+
+        m = len(edges)
+        item_size = array('q').itemsize
+
+        # edge ids are laid out as all x ids followed by all y ids
+        edge_shm = SharedMemory(create=True, size=2*m*item_size)
+        try:
+            edge_view = edge_shm.buf.cast('q')
+            edge_view[:m] = array('q', x_ids)
+            edge_view[m:] = array('q', y_ids)
+            edge_view.release()
+            del x_ids, y_ids
+
+            # contiguous chunks whose sizes differ by at most one edge
+            bounds = [k*m // workers for k in range(workers+1)]
+            with Pool(workers) as pool:
+                forests = pool.starmap(_compactChunk, [(edge_shm.name, m, bounds[k], bounds[k+1]) for k in range(workers)])
+
+                # every merge of a round runs in parallel, and the merged forests are again flat
+                while len(forests) > 1:
+                    merged = pool.starmap(_mergeForests, zip(forests[0::2], forests[1::2]))
+                    if len(forests) % 2:
+                        merged.append(forests[-1])
+                    forests = merged
+        finally:
+            edge_shm.close()
+            edge_shm.unlink()
+
+        children, roots = forests[0]
+        uf._attachFlat(_copyArray(children), _copyArray(roots))
+        return uf
+
+    """
+    Attaches each child id directly under its root id, on a forest where every id is still a
+        singleton. The (child, root) pairs must form a flat forest: no root is also a child
+
+    :type child_ids: Iterable[int]
+    :type root_ids: Iterable[int]
+    :rtype: void
+    """
+    def _attachFlat(self, child_ids, root_ids):
+        parent = self.parent
+        counts = self.counts
+        nxt = self.next
+        attached = 0
+        for child, root in zip(child_ids, root_ids):
+            parent[child] = root
+            counts[root] += 1
+
+            # splice the child into the circular member list of the root, right after it
+            nxt[child] = nxt[root]
+            nxt[root] = child
+            attached += 1
+
+        self.numSets -= attached
+        if self.roots is not None:
+            self.roots.difference_update(map(self.elements.__getitem__, child_ids))
+
+    """
+    Writes the datastructure to a file. The file holds a fixed size header, the parent, counts and
+        member list arrays as raw native integers, and (unless built with fromSize) the pickled
+        element table
+
+    :type path: string
+    :rtype: void
+    """
+    def save(self, path):
+        dense = type(self.map) is range
+        table = b"" if dense else pickle.dumps(list(self.elements), protocol=pickle.HIGHEST_PROTOCOL)
+
+        flags = 0
+        if dense:
+            flags |= _FLAG_DENSE
+        if sys.byteorder == "big":
+            flags |= _FLAG_BIG_ENDIAN
+
+        with open(path, "wb") as f:
+            f.write(_FILE_HEADER.pack(_FILE_MAGIC, flags, len(self.parent), self.numSets, len(table)))
+            f.write(self.parent)
+            f.write(self.counts)
+            f.write(self.next)
+            f.write(table)
+
+    """
+    Reads a datastructure written by save
+
+    If useMmap is True, the integer arrays are views straight into a private copy-on-write memory
+        map of the file rather than copies -- nothing is read until it's touched, and writes (e.g.
+        path compression) only ever go to the process's own copy of a page, never to the file
+
+    The element table is read with pickle.loads, which can run arbitrary code -- only load files
+        from a trusted source
+
+    :type path: string
+    :type useMmap: bool
+    :type validate: bool -- same as the constructor
+    :rtype: UnionFind
+    """
+    @classmethod
+    def load(cls, path, useMmap=True, validate=True):
+        with open(path, "rb") as f:
+            # also keeps mmap from failing on an empty file
+            assert os.fstat(f.fileno()).st_size >= _FILE_HEADER.size, "{} is too short to be a saved UnionFind".format(path)
+            if useMmap:
+                data = memoryview(mmap(f.fileno(), 0, access=ACCESS_COPY))
+            else:
+                data = memoryview(f.read())
+
+        magic, flags, n, num_sets, table_size = _FILE_HEADER.unpack_from(data)
+        assert magic == _FILE_MAGIC, "{} is not a saved UnionFind".format(path)
+        assert bool(flags & _FLAG_BIG_ENDIAN) == (sys.byteorder == "big"), "{} was saved with a different byte order".format(path)
+        assert n >= 0 and table_size >= 0 and len(data) >= _FILE_HEADER.size + 24*n + table_size, "{} is truncated".format(path)
+
+        # the three arrays follow the header back to back
+        offset = _FILE_HEADER.size
+        arrays = []
+        for _ in range(3):
+            if useMmap:
+                arrays.append(data[offset:offset + 8*n].cast('q'))
+            else:
+                arrays.append(_copyArray(data[offset:offset + 8*n]))
+            offset += 8*n
+
+        uf = cls.__new__(cls)
+        uf.validate = validate
+        uf.parent, uf.counts, uf.next = arrays
+        uf.numSets = num_sets
+        uf.history = None
+        uf.metrics = None
+        uf._initStrategy("full", "size")
+
+        if flags & _FLAG_DENSE:
+            uf.elements = range(n)
+            uf.map = range(n)
+            uf.roots = None
+        else:
+            uf.elements = pickle.loads(data[offset:offset + table_size])
+            uf.map = {el: i for i, el in enumerate(uf.elements)}
+            uf.roots = set(uf.elements[i] for i in uf._iterRootIds())
+
+        return uf
+
+    """
+    Copies the integer arrays out of a memory map (see load), so that they can grow
+
+    :rtype: void
+    """
+    def _ensureGrowable(self):
+        if type(self.parent) is not array:
+            self.parent = _copyArray(self.parent)
+            self.counts = _copyArray(self.counts)
+            self.next = _copyArray(self.next)
+
+    """
+    Sets up the forest of n singleton groups over ids {0, 1, ... n-1}
+
+    :type n: int
+    :rtype: void
+    """
+    def _initForest(self, n):
         # maintains number of elements in group for every root (only valid for root nodes)
-        self.counts = [1]*n
+        #   kept in a contiguous integer array rather than a list of boxed ints
+        self.counts = array('q', [1])*n
 
         # self.parent[i] is the parent of i -- if i == self.parent[i] then i is a root
-        self.parent = [i for i in range(n)]
+        self.parent = array('q', range(n))
+
+        # self.next links the members of each set into a circular list -- following self.next
+        #   from any member visits every member of its set exactly once
+        self.next = array('q', range(n))
+
+        # number of disjoint sets (equivalently, number of roots)
+        self.numSets = n
+
+    """
+    Selects the find and link strategies, as the bound methods that find, union and unionMany
+        call, so that no call has to check which strategy is in use
+
+    :type compression: string -- same as the constructor
+    :type linking: string -- same as the constructor
+    :rtype: void
+    """
+    def _initStrategy(self, compression, linking):
+        self.compression = compression
+        self.linking = linking
+
+        # path compression can't be undone, so rollback mode never compresses
+        if self.history is not None:
+            self._rootOf = self._rootOfUncompressed
+        elif compression == "full":
+            self._rootOf = self._rootOfFull
+        elif compression == "halving":
+            self._rootOf = self._rootOfHalving
+        else:
+            self._rootOf = self._rootOfSplitting
+
+        if linking == "size":
+            self._linkRoots = self._linkBySize
+            self.ranks = None
+        else:
+            self._linkRoots = self._linkByRank
+            # self.ranks[i] bounds the height of the tree under root i (only valid for root nodes)
+            self.ranks = array('q', [0])*len(self.parent)
 
     """
     Unions the sets of two distinct elements
@@ -54,30 +484,18 @@ class UnionFind(object):
     """
     def union(self, x, y):
         # check for valid input
-        assert x in self.elements
-        assert y in self.elements
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+            validInput, err_msg = self._validX(y)
+            assert (validInput), err_msg
 
-        # obain representatives of each set
-        root_x = self.find(x)
-        root_y = self.find(y)
-
-        # transform into indices
-        rx = self.map[root_x]
-        ry = self.map[root_y]
+        # obain representatives of each set, as indices
+        rx = self._rootOf(self.map[x])
+        ry = self._rootOf(self.map[y])
 
         if rx != ry:
-            # must merge the two groups -- merge smaller group into larger group
-
-            if self.counts[rx] < self.counts[ry]:
-                self.parent[rx] = ry
-                self.counts[ry] += self.counts[rx]
-                if root_x in self.roots:
-                    self.roots.remove(root_x)
-            else:
-                self.parent[ry] = rx
-                self.counts[rx] += self.counts[ry]
-                if root_y in self.roots:
-                    self.roots.remove(root_y)
+            self._linkRoots(rx, ry)
 
     """
     Obtains the representative element of the set corresponding to the given element
@@ -86,28 +504,323 @@ class UnionFind(object):
     :rtype: Undefined -- an element of the constructor input list
     """
     def find(self, x):
-        # transform into indices
-        x_id = self.map[x]
+        # check for valid input (indexing the range of a fromSize datastructure would silently
+        #   wrap negative ids)
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        return self.elements[self._rootOf(self.map[x])]
+
+    """
+    Unions the sets of each pair (xs[k], ys[k]). Equivalent to calling union(xs[k], ys[k])
+        for every k in order, but processes the whole batch in one call
+
+    :type xs: Iterable[Undefined] -- each x must be an element of the constructor input list
+    :type ys: Iterable[Undefined] -- each y must be an element of the constructor input list, 
+                                     and ys must have the same length as xs
+    :rtype: void
+    """
+    def unionMany(self, xs, ys):
+        # transform the whole batch into indices up front
+        x_ids = self._toIds(xs)
+        y_ids = self._toIds(ys)
+        assert len(x_ids) == len(y_ids), "xs and ys must have the same length"
+
+        self._unionIds(x_ids, y_ids)
+
+    """
+    Unions the sets of each pair of ids (x_ids[k], y_ids[k]), in order
+
+    :type x_ids: Iterable[int]
+    :type y_ids: Iterable[int]
+    :rtype: void
+    """
+    def _unionIds(self, x_ids, y_ids):
+        # bind attributes to locals once for the whole batch
+        parent = self.parent
+        counts = self.counts
+        elements = self.elements
+        roots = self.roots
+        nxt = self.next
+        history = self.history
+        compress = history is None
+        link_by_rank = self._linkRoots if self.ranks is not None else None
+        merged = 0
+
+        for rx, ry in zip(x_ids, y_ids):
+            # find the root of each group, with path halving (every visited node skips
+            #   its parent) whichever compression find uses, since it needs a single pass
+            while parent[rx] != rx:
+                if compress:
+                    parent[rx] = parent[parent[rx]]
+                rx = parent[rx]
+            while parent[ry] != ry:
+                if compress:
+                    parent[ry] = parent[parent[ry]]
+                ry = parent[ry]
+
+            if rx != ry:
+                if link_by_rank is not None:
+                    link_by_rank(rx, ry)
+                    continue
+
+                # merge smaller group into larger group, breaking ties exactly as union does
+                #   so the resulting representatives match the scalar api
+                if counts[rx] < counts[ry]:
+                    rx, ry = ry, rx
+                parent[ry] = rx
+                counts[rx] += counts[ry]
+                nxt[rx], nxt[ry] = nxt[ry], nxt[rx]
+                merged += 1
+                if roots is not None:
+                    roots.discard(elements[ry])
+                if history is not None:
+                    history.append(ry)
+
+        self.numSets -= merged
+
+    """
+    Obtains the root id of the given id, pointing every id on the path at the root (in a second
+        pass, once the root is known)
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _rootOfFull(self, x_id):
+        parent = self.parent
 
         # find the root of the group
         root = x_id
-        while self.parent[root] != root:
-            root = self.parent[root]
+        while parent[root] != root:
+            root = parent[root]
 
         # go back and make each node in the path point to root
         # AKA path compression
-        curr = x_id
-        while curr != root:
+        while x_id != root:
             # save the next parent
-            par = self.parent[curr]
+            par = parent[x_id]
 
             # set new parent to the root
-            self.parent[curr] = root
+            parent[x_id] = root
 
             # go to next parent
-            curr = par
+            x_id = par
+
+        return root
+
+    """
+    Obtains the root id of the given id, pointing every other id on the path at its grandparent
+        (path halving) -- a single pass, which halves the length of the path
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _rootOfHalving(self, x_id):
+        parent = self.parent
+        while parent[x_id] != x_id:
+            parent[x_id] = parent[parent[x_id]]
+            x_id = parent[x_id]
+        return x_id
+
+    """
+    Obtains the root id of the given id, pointing every id on the path at its grandparent
+        (path splitting) -- a single pass, which splits the path into two paths of half the length
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _rootOfSplitting(self, x_id):
+        parent = self.parent
+        par = parent[x_id]
+        while par != x_id:
+            parent[x_id] = parent[par]
+            x_id = par
+            par = parent[x_id]
+        return x_id
+
+    """
+    Obtains the root id of the given id, without changing the path (used in rollback mode)
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _rootOfUncompressed(self, x_id):
+        parent = self.parent
+        while parent[x_id] != x_id:
+            x_id = parent[x_id]
+        return x_id
+
+    """
+    Merges the sets of two distinct roots, attaching the root of the smaller set under the other
+        (the second root, if the sets have the same size)
+
+    :type rx: int
+    :type ry: int
+    :rtype: void
+    """
+    def _linkBySize(self, rx, ry):
+        counts = self.counts
+        if counts[rx] < counts[ry]:
+            rx, ry = ry, rx
+        self._attach(ry, rx)
+        if self.history is not None:
+            self.history.append(ry)
+
+    """
+    Merges the sets of two distinct roots, attaching the root of lower rank under the other (the
+        second root, if the ranks are equal, which then raises the rank of the first)
+
+    :type rx: int
+    :type ry: int
+    :rtype: void
+    """
+    def _linkByRank(self, rx, ry):
+        ranks = self.ranks
+        if ranks[rx] < ranks[ry]:
+            rx, ry = ry, rx
+        raised = ranks[rx] == ranks[ry]
+        if raised:
+            ranks[rx] += 1
+        self._attach(ry, rx)
+        if self.history is not None:
+            # unions that raised a rank are logged as negative ids, so rollback can lower it again
+            self.history.append(-1 - ry if raised else ry)
+
+    """
+    Attaches a root under another root, merging their sets
+
+    :type child: int
+    :type root: int
+    :rtype: void
+    """
+    def _attach(self, child, root):
+        self.parent[child] = root
+        self.counts[root] += self.counts[child]
+
+        # splice the two circular member lists into one
+        nxt = self.next
+        nxt[root], nxt[child] = nxt[child], nxt[root]
+
+        self.numSets -= 1
+        if self.roots is not None:
+            self.roots.discard(self.elements[child])
+
+    """
+    Obtains the representative element of the set corresponding to each given element. 
+        Equivalent to [find(x) for x in xs]
+
+    :type xs: Iterable[Undefined] -- each x must be an element of the constructor input list
+    :rtype: List[Undefined] -- elements of the constructor input list, in the same order as xs
+    """
+    def findMany(self, xs):
+        # transform into indices
+        ids = self._toIds(xs)
+
+        # pointer jumping -- move every query one step up the forest per pass, until
+        #   every query sits at a root
+        parent = self.parent
+        curr = [parent[i] for i in ids]
+        while True:
+            nxt = [parent[i] for i in curr]
+            if nxt == curr:
+                break
+            curr = nxt
+
+        # path compression for every queried element
+        if self.history is None:
+            for i, root in zip(ids, curr):
+                parent[i] = root
+
+        elements = self.elements
+        return [elements[root] for root in curr]
+
+    """
+    Obtains a marker of the current state of the datastructure, to later roll back to.
+        Only available in rollback mode
+
+    :rtype: int
+    """
+    def snapshot(self):
+        assert self.history is not None, "snapshot requires rollback mode"
+        return len(self.history)
+
+    """
+    Undoes every union made since the given snapshot was taken, most recent first. Snapshots
+        taken after the given one become invalid. Elements added since are kept, as singleton sets
+
+    :type snapshot: int -- returned by snapshot()
+    :rtype: void
+    """
+    def rollback(self, snapshot):
+        assert self.history is not None, "rollback requires rollback mode"
+        assert 0 <= snapshot <= len(self.history), "{} is not a valid snapshot".format(snapshot)
+
+        history = self.history
+        parent = self.parent
+        counts = self.counts
+        nxt = self.next
+        while len(history) > snapshot:
+            child = history.pop()
+            if child < 0:
+                # the union raised the rank of the root (see _linkByRank)
+                child = -1 - child
+                self.ranks[parent[child]] -= 1
+            root = parent[child]
+
+            # every union after this one is already undone, so root and child are exactly as
+            #   the merge left them
+            parent[child] = child
+            counts[root] -= counts[child]
+            nxt[root], nxt[child] = nxt[child], nxt[root]
+            self.numSets += 1
+            if self.roots is not None:
+                self.roots.add(self.elements[child])
+
+    """
+    Checks whether two elements are in the same set
+
+    :type x: Undefined -- x must be an element of the constructor input list
+    :type y: Undefined -- y must be an element of the constructor input list
+    :rtype: bool
+    """
+    def sameSet(self, x, y):
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+            validInput, err_msg = self._validX(y)
+            assert (validInput), err_msg
+        return self._rootOf(self.map[x]) == self._rootOf(self.map[y])
+
+    """
+    Points every element directly at its representative, then makes the datastructure read-only:
+        union, unionMany, add, addMany, snapshot and rollback are no longer allowed, and find and
+        sameSet become a single array lookup. The arrays are replaced by read-only views, so
+        nothing can write to them -- after a fork, every process keeps reading the same physical
+        pages. Stops metrics and rollback mode, if enabled
 
-        return self.elements[root]
+    :rtype: void
+    """
+    def freeze(self):
+        parent = self.parent
+
+        # pointer jumping over the whole forest at once -- each pass points every id at its
+        #   grandparent, until a pass changes nothing
+        while True:
+            grandparent = array('q', map(parent.__getitem__, parent))
+            if grandparent == parent:
+                break
+            parent = grandparent
+
+        self.parent = memoryview(parent).toreadonly()
+        self.counts = memoryview(self.counts).toreadonly()
+        self.next = memoryview(self.next).toreadonly()
+        self.history = None
+        self.disableMetrics()
+
+        # every id points directly at its root, so the root of an id is its parent
+        self._rootOf = self.parent.__getitem__
+        self.__class__ = _FrozenUnionFind
 
     """
     Obtains the set of representative elements for all sets in datastructure
@@ -115,6 +828,8 @@ class UnionFind(object):
     :rtype: Set[Undefined] -- elements must be elements of the constructor input list
     """
     def getRoots(self):
+        if self.roots is None:
+            return set(self._iterRootIds())
         return set(self.roots)
 
     """
@@ -122,8 +837,10 @@ class UnionFind(object):
     :type x: Undefined -- x must be an element of the constructor input list
     """
     def getSize(self, x):
-        assert x in self.elements
-        return self.counts[self.map[self.find(x)]]
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+        return self.counts[self._rootOf(self.map[x])]
 
     """
     Obtains a mapping of set representative elements to the number of elements in each set (including the representative element)
@@ -131,7 +848,537 @@ class UnionFind(object):
     :rtype: Map[Undefined, int] -- each key is an element of the constructor input list, and the mapped integer is the number of elements in the disjoint set represented by the key
     """
     def getRootSizes(self):
+        if self.roots is None:
+            return {root: self.counts[root] for root in self._iterRootIds()}
+
         root_sizes = {}
         for root in self.roots:
             root_sizes[root] = self.counts[self.map[root]]
         return root_sizes
+
+    """
+    Iterates over the representative elements of all sets, without copying them. The datastructure
+        must not be modified while the iterator is in use
+
+    :rtype: Iterator[Undefined] -- elements of the constructor input list
+    """
+    def iterRoots(self):
+        if self.roots is None:
+            return self._iterRootIds()
+        return iter(self.roots)
+
+    """
+    Obtains a read-only, live mapping of set representative elements to the number of elements in
+        each set. The view reflects later unions and adds without being rebuilt
+
+    :rtype: Mapping[Undefined, int] -- same contents as getRootSizes()
+    """
+    def getRootSizesView(self):
+        return _RootSizesView(self)
+
+    """
+    Obtains the number of disjoint sets in the datastructure
+
+    :rtype: int
+    """
+    def getNumSets(self):
+        return self.numSets
+
+    """
+    Obtains all elements in the same set as the given element (including the element itself)
+
+    :type x: Undefined -- x must be an element of the constructor input list
+    :rtype: List[Undefined] -- elements of the constructor input list
+    """
+    def getMembers(self, x):
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        elements = self.elements
+        return [elements[i] for i in self._iterMemberIds(self.map[x])]
+
+    """
+    Iterates over every set in the datastructure, as lists of the elements in each set
+
+    :rtype: Iterator[List[Undefined]] -- the lists partition the elements of the datastructure
+    """
+    def iterSets(self):
+        elements = self.elements
+        if self.roots is None:
+            root_ids = self._iterRootIds()
+        else:
+            root_ids = map(self.map.__getitem__, self.roots)
+
+        for root in root_ids:
+            yield [elements[i] for i in self._iterMemberIds(root)]
+
+    """
+    Start collecting metrics on every find and union: the length of every path walked to a root,
+        the parent pointers rewritten by path compression, and the unions that merged two sets
+        or found them already joined. Metrics are kept by switching the datastructure to an
+        instrumented class, so one that never enables them runs exactly the same code as before
+
+    :rtype: void
+    """
+    def enableMetrics(self):
+        # subclasses replace find and union with their own, which the instrumented class would hide
+        assert type(self) in (UnionFind, _MeteredUnionFind), "metrics are not supported by {}".format(type(self).__name__)
+        self.disableMetrics()
+        self.metrics = _UnionFindMetrics(self._rootOf)
+        self.__class__ = _MeteredUnionFind
+        self._rootOf = self._rootOfMetered
+
+    """
+    Stop collecting metrics, switching back to the uninstrumented class, and discard the metrics
+        collected so far
+
+    :rtype: void
+    """
+    def disableMetrics(self):
+        if self.metrics is not None:
+            self.__class__ = UnionFind
+            self._rootOf = self.metrics.rootOf
+            self.metrics = None
+
+    """
+    Obtain a snapshot of the metrics collected since enableMetrics, together with the current
+        shape of the sets
+        - "finds": number of root lookups, including the ones made by union, unionMany, findMany
+            and getSize
+        - "pathLengths": histogram of the number of parent links followed by each root lookup
+        - "pointersRewritten": number of parent pointers changed by path compression
+        - "unionsMerged", "unionsJoined": number of unions (including each pair of unionMany) that
+            merged two sets, or found both elements already in the same set
+        - "numSets", "largestSet": number of sets, and number of elements in the largest one
+        - "setSizes": histogram of the number of elements in each set
+
+    :rtype: dict, or None if metrics are not enabled
+    """
+    def getMetrics(self):
+        if self.metrics is None:
+            return None
+
+        counts = self.counts
+        if self.roots is None:
+            root_ids = self._iterRootIds()
+        else:
+            root_ids = map(self.map.__getitem__, self.roots)
+        set_sizes = {}
+        for root in root_ids:
+            set_sizes[counts[root]] = set_sizes.get(counts[root], 0) + 1
+
+        snapshot = self.metrics.snapshot()
+        snapshot["numSets"] = self.numSets
+        snapshot["largestSet"] = max(set_sizes, default=0)
+        snapshot["setSizes"] = set_sizes
+        return snapshot
+
+    """
+    Iterates over the ids of every member in the set containing the given id, by walking the
+        circular member list
+
+    :type x_id: int
+    :rtype: Iterator[int]
+    """
+    def _iterMemberIds(self, x_id):
+        nxt = self.next
+        curr = x_id
+        while True:
+            yield curr
+            curr = nxt[curr]
+            if curr == x_id:
+                return
+
+    """
+    Obtains the ids of all roots by scanning the forest (used when roots aren't maintained in a set)
+
+    :rtype: Iterator[int]
+    """
+    def _iterRootIds(self):
+        parent = self.parent
+        return (i for i in range(len(parent)) if parent[i] == i)
+
+    """
+    Transforms a batch of elements into their ids
+
+    :type xs: Iterable[Undefined] -- each x must be an element of the datastructure
+    :rtype: List[int]
+    """
+    def _toIds(self, xs):
+        if type(self.map) is not range:
+            # raises KeyError on unknown elements
+            return list(map(self.map.__getitem__, xs))
+
+        # elements are their own ids, but indexing a range would silently wrap negative ids
+        ids = list(xs)
+        if self.validate and ids:
+            assert 0 <= min(ids) and max(ids) < len(self.map), "ids must be in the range 0...{}".format(len(self.map)-1)
+        return ids
+
+    """
+    Check if compression and linking name strategies of the datastructure
+
+    :type compression: Undefined
+    :type linking: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validStrategy(self, compression, linking):
+        if compression not in ("full", "halving", "splitting"):
+            err_msg = "{} is not a compression strategy (full, halving or splitting)".format(compression)
+            return False, err_msg
+
+        if linking not in ("size", "rank"):
+            err_msg = "{} is not a linking strategy (size or rank)".format(linking)
+            return False, err_msg
+
+        # passed all checks
+        return True, ""
+
+    """
+    Check if x is an element of the datastructure
+
+    :type x: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validX(self, x):
+        if type(self.map) is range:
+            # range membership is only O(1) for ints
+            valid = type(x) is int and x in self.map
+        else:
+            valid = x in self.map
+
+        if not valid:
+            err_msg = "{} is not an element of the datastructure".format(x)
+            return False, err_msg
+
+        # passed all checks
+        return True, ""
+
+
+"""
+Read-only mapping view of the root sizes of a UnionFind. Never copies the roots -- every lookup
+    and iteration reads the datastructure's current state
+"""
+class _RootSizesView(Mapping):
+    def __init__(self, uf):
+        self._uf = uf
+
+    def __getitem__(self, root):
+        uf = self._uf
+        if uf.roots is None:
+            # dense mode -- root is valid if it's an id that is its own parent
+            if type(root) is int and 0 <= root < len(uf.parent) and uf.parent[root] == root:
+                return uf.counts[root]
+        elif root in uf.roots:
+            return uf.counts[uf.map[root]]
+        raise KeyError(root)
+
+    def __iter__(self):
+        return self._uf.iterRoots()
+
+    def __len__(self):
+        return self._uf.numSets
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, dict(self))
+
+
+"""
+UnionFind after freeze: every element points directly at its representative, and the arrays are
+    read-only views. Only the methods that would write to the arrays are replaced
+"""
+class _FrozenUnionFind(UnionFind):
+    """
+    Find, as a single lookup
+    """
+    def find(self, x):
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+        return self.elements[self.parent[self.map[x]]]
+
+    """
+    FindMany, as a single lookup per element
+    """
+    def findMany(self, xs):
+        parent = self.parent
+        elements = self.elements
+        return [elements[parent[i]] for i in self._toIds(xs)]
+
+    """
+    SameSet, as a single comparison
+    """
+    def sameSet(self, x, y):
+        if self.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+            validInput, err_msg = self._validX(y)
+            assert (validInput), err_msg
+        parent = self.parent
+        return parent[self.map[x]] == parent[self.map[y]]
+
+    """
+    Not allowed once frozen
+    """
+    def union(self, x, y):
+        assert False, "the datastructure is frozen"
+
+    """
+    Not allowed once frozen
+    """
+    def unionMany(self, xs, ys):
+        assert False, "the datastructure is frozen"
+
+    """
+    Not allowed once frozen
+    """
+    def add(self, x):
+        assert False, "the datastructure is frozen"
+
+    """
+    Not allowed once frozen
+    """
+    def addMany(self, xs):
+        assert False, "the datastructure is frozen"
+
+    """
+    Not allowed once frozen
+    """
+    def snapshot(self):
+        assert False, "the datastructure is frozen"
+
+    """
+    Not allowed once frozen
+    """
+    def rollback(self, snapshot):
+        assert False, "the datastructure is frozen"
+
+    """
+    Already flat and read-only
+    """
+    def freeze(self):
+        pass
+
+"""
+Metrics collected by an instrumented UnionFind
+"""
+class _UnionFindMetrics(object):
+    """
+    Creates empty metrics
+
+    :type rootOf: Callable[[int], int] -- the uninstrumented strategy finding the root of an id
+    """
+    def __init__(self, rootOf):
+        self.rootOf = rootOf
+
+        self.finds = 0
+        self.pathLengths = {}
+        self.pointersRewritten = 0
+        self.unionsMerged = 0
+        self.unionsJoined = 0
+
+    """
+    Obtain a copy of the metrics, safe to keep while collection continues
+
+    :rtype: dict
+    """
+    def snapshot(self):
+        return {
+            "finds": self.finds,
+            "pathLengths": dict(self.pathLengths),
+            "pointersRewritten": self.pointersRewritten,
+            "unionsMerged": self.unionsMerged,
+            "unionsJoined": self.unionsJoined,
+        }
+
+"""
+Instrumented UnionFind, used in place of UnionFind while metrics are enabled. Every root lookup
+    walks the path it's about to compress and records it, defers to UnionFind, then counts the
+    parent pointers that changed along the path. Lookups made by find, union, getSize and sameSet
+    all go through _rootOf, which is replaced by _rootOfMetered
+"""
+class _MeteredUnionFind(UnionFind):
+    """
+    Union, recorded in the metrics
+    """
+    def union(self, x, y):
+        num_sets = self.numSets
+        UnionFind.union(self, x, y)
+        self._recordUnions(num_sets - self.numSets, 1)
+
+    """
+    FindMany, recorded in the metrics
+    """
+    def findMany(self, xs):
+        xs = list(xs)
+        paths = [self._recordPath(i) for i in self._toIds(xs)]
+        roots = UnionFind.findMany(self, xs)
+        for path in paths:
+            self._recordRewrites(path)
+        return roots
+
+    """
+    Unions of a batch of ids, recorded in the metrics one pair at a time, since each union
+        changes the paths walked by the next (a batch walks its paths inline, without _rootOf)
+    """
+    def _unionIds(self, x_ids, y_ids):
+        unions = 0
+        num_sets = self.numSets
+        for x_id, y_id in zip(x_ids, y_ids):
+            x_path = self._recordPath(x_id)
+            y_path = self._recordPath(y_id)
+            UnionFind._unionIds(self, (x_id,), (y_id,))
+            self._recordRewrites(x_path)
+            self._recordRewrites(y_path)
+            unions += 1
+        self._recordUnions(num_sets - self.numSets, unions)
+
+    """
+    Root lookup with the selected strategy, recorded in the metrics
+
+    :type x_id: int
+    :rtype: int
+    """
+    def _rootOfMetered(self, x_id):
+        path = self._recordPath(x_id)
+        root = self.metrics.rootOf(x_id)
+        self._recordRewrites(path)
+        return root
+
+    """
+    Record a root lookup from the given id, before it's made
+
+    :type x_id: int
+    :rtype: List[Tuple[int, int]] -- every non-root id on the path, with its parent
+    """
+    def _recordPath(self, x_id):
+        parent = self.parent
+        path = []
+        while parent[x_id] != x_id:
+            path.append((x_id, parent[x_id]))
+            x_id = parent[x_id]
+
+        metrics = self.metrics
+        metrics.finds += 1
+        metrics.pathLengths[len(path)] = metrics.pathLengths.get(len(path), 0) + 1
+        return path
+
+    """
+    Record the parent pointers that a root lookup changed along the path it walked. A lookup
+        never changes which ids are roots, so only compression changes their parents
+
+    :type path: List[Tuple[int, int]] -- returned by _recordPath
+    :rtype: void
+    """
+    def _recordRewrites(self, path):
+        parent = self.parent
+        self.metrics.pointersRewritten += sum(1 for i, par in path if parent[i] != par)
+
+    """
+    Record the outcome of a number of unions
+
+    :type merged: int -- number of the unions that merged two sets
+    :type unions: int -- number of unions
+    :rtype: void
+    """
+    def _recordUnions(self, merged, unions):
+        self.metrics.unionsMerged += merged
+        self.metrics.unionsJoined += unions - merged
+
+"""
+Copies a buffer of native 64 bit integers into a new array
+
+:type buf: bytes-like object
+:rtype: array
+"""
+def _copyArray(buf):
+    arr = array('q')
+    arr.frombytes(memoryview(buf).cast('B'))
+    return arr
+
+"""
+Compacts the forest given by a list of edges over ids into a flat forest, by unioning them with
+    union by size and path halving over a dict (so only the ids the edges touch take memory)
+
+:type x_ids: Iterable[int]
+:type y_ids: Iterable[int]
+:type parent: dict -- parent of every non-root id of a forest to union the edges into, if any
+:type sizes: dict -- size of every root of that forest with children
+:rtype: Tuple[bytes, bytes] -- native 64 bit child ids, and the root id of each child
+"""
+def _compactForest(x_ids, y_ids, parent=None, sizes=None):
+    # ids missing from parent are roots, and only roots with children have an entry in sizes
+    if parent is None:
+        parent = {}
+        sizes = {}
+    get = parent.get
+
+    for rx, ry in zip(x_ids, y_ids):
+        par = get(rx, rx)
+        while par != rx:
+            parent[rx] = get(par, par)
+            rx = parent[rx]
+            par = get(rx, rx)
+        par = get(ry, ry)
+        while par != ry:
+            parent[ry] = get(par, par)
+            ry = parent[ry]
+            par = get(ry, ry)
+
+        if rx != ry:
+            size_x = sizes.pop(rx, 1)
+            size_y = sizes.pop(ry, 1)
+            if size_x < size_y:
+                rx, ry = ry, rx
+            parent[ry] = rx
+            sizes[rx] = size_x + size_y
+
+    # every id with a parent is a child, and roots never have one
+    children = array('q', parent)
+    roots = array('q')
+    for child in children:
+        root = parent[child]
+        while root in parent:
+            root = parent[root]
+        parent[child] = root
+        roots.append(root)
+    return children.tobytes(), roots.tobytes()
+
+"""
+Worker for UnionFind.fromEdges -- compacts one chunk of the shared edge ids into a flat forest
+
+:type edge_name: string -- name of the shared memory block holding all x ids then all y ids
+:type m: int -- total number of edges
+:type start: int -- first edge of the chunk
+:type end: int -- one past the last edge of the chunk
+:rtype: Tuple[bytes, bytes] -- same as _compactForest
+"""
+def _compactChunk(edge_name, m, start, end):
+    edge_shm = SharedMemory(name=edge_name)
+    edge_view = edge_shm.buf.cast('q')
+    try:
+        x_ids = edge_view[start:end].tolist()
+        y_ids = edge_view[m+start:m+end].tolist()
+    finally:
+        edge_view.release()
+        edge_shm.close()
+    return _compactForest(x_ids, y_ids)
+
+"""
+Worker for UnionFind.fromEdges -- merges two flat forests into one
+
+:type first: Tuple[bytes, bytes] -- returned by _compactForest
+:type second: Tuple[bytes, bytes] -- returned by _compactForest
+:rtype: Tuple[bytes, bytes] -- same as _compactForest
+"""
+def _mergeForests(first, second):
+    if len(first[0]) < len(second[0]):
+        first, second = second, first
+
+    # the larger forest is already flat, so it's taken as is -- only the pairs of the smaller one
+    #   (each an edge between two ids of the same set) are unioned into it
+    roots = _copyArray(first[1])
+    parent = dict(zip(_copyArray(first[0]), roots))
+    sizes = dict((root, count + 1) for root, count in Counter(roots).items())
+    return _compactForest(_copyArray(second[0]), _copyArray(second[1]), parent, sizes)
@@ -1,6 +1,3 @@
-from math import sqrt
-from math import log
-
 """
 Python implementation of Van-Embde-Boas datastructure. Solves the predecessor/successor problem.
 
@@ -16,14 +13,45 @@ Runtimes:
     - predecessor: O( lg(lg(u)) )
     - insert: O( lg(lg(u)) )
     - delete: O( lg(lg(u)) )
+    - member: O( lg(lg(u)) )
+    - len/getMin/getMax: O( 1 )
+    - successorMany/predecessorMany: O( m * lg(lg(u)) ) for m queries, with queries that share
+        clusters sharing the descent into them
+    - iterRange/countRange/iteration: O( (k + 1) * lg(lg(u)) ) worst case, where k is the number
+        of integers reported. Every cluster and summary on the way to an integer is walked once,
+        so integers packed into shared clusters cost O( 1 ) each, but widely spread ones cost
+        O( lg(lg(u)) ) each -- the same bound as a successor call per integer, with a smaller
+        constant
+    - fromSorted: O( n * lg(lg(u)) ), but each element costs a shift and a mask per level instead
+        of a full insert
 
 Space: 
     - O(n * lg(lg(u)))
+    * The recursion stops at clusters of leafSize integers or fewer, which are stored as bitsets.
+        This removes the bottom levels of tiny objects, at a cost of up to leafSize bits per
+        leaf
     * There is an implementation that utilizes O(n) space that uses the current implementation
         as a starting point. Please see final minutes of the video in the above link
         for more details.
 """
+from bisect import bisect_left
+from bisect import bisect_right
+import gc
+
+# cluster map of every structure that stores nothing in its clusters -- shared, so the many
+#   structures holding a single element (in min/max alone) don't each carry an empty dict. It's
+#   never written to: a structure gets its own cluster map together with its summary, and only
+#   ever writes to that one (a plain dict, unlike a read-only proxy, can be pickled and copied)
+_NO_CLUSTERS = {}
+
 class VEB(object):
+    # smallest possible input for VEB
+    SMALLEST_U = 2
+
+    # millions of nodes make up a large structure, so each one only holds what differs between
+    #   nodes -- everything determined by its universe size lives in the level it points to
+    __slots__ = ("level", "min", "max", "cluster", "summary")
+
     """
     Creates a new Van-Embde-Boas structure where each int is contained in the range
         {0, 1, ... u-1}
@@ -32,26 +60,157 @@ class VEB(object):
                     - u = 2 = 2^2^0
                     - u = 256 = 2^2^3
                     - u = 2^32 = 2^2^5
+    :type leafSize: int, a power of 2 -- clusters and summaries over a universe of at most leafSize
+                integers are stored as bitsets instead of recursive structures. Those universes
+                are all of the form 2^2^k too, so for example leafSize = 64 makes bitset leaves
+                of 16 integers, and leafSize = 4096 makes bitset leaves of 256 integers
+    :type validate: bool -- if False, integers passed to the structure are trusted to be valid and
+                are never checked. Integers are otherwise only checked once, when they are passed
+                in, and never again while recursing
     """
-    def __init__(self, u=2**32):
+    def __init__(self, u=2**32, leafSize=256, validate=True):
         validInput, err_msg = self._validU(u)
         assert (validInput), err_msg
-        
-        # smallest possible input for VEB
-        self.SMALLEST_U = 2
 
-        self.u = u
+        validInput, err_msg = self._validLeafSize(leafSize)
+        assert (validInput), err_msg
+
+        self._initEmpty(_VEBLevel(u, leafSize, validate))
+
+    """
+    Size of the universe {0, 1, ... u-1} of this structure
+
+    :rtype: int
+    """
+    @property
+    def u(self):
+        return self.level.u
+
+    """
+    Creates a new, empty cluster or summary for this structure -- skips validating u, since
+        sqrt(u) is always valid when u is
+
+    :rtype: VEB or _VEBLeaf
+    """
+    def _newChild(self):
+        level = self.level
+        if level.leafChildren:
+            return _VEBLeaf(1 << level.lowBits)
+
+        child = VEB.__new__(VEB)
+        child._initEmpty(level.child)
+        return child
+
+    """
+    Sets up an empty structure over the universe of a level
+
+    :type level: _VEBLevel
+    :rtype: void
+    """
+    def _initEmpty(self, level):
+        self.level = level
+
         self.min = None
         self.max = None
 
-        # only store non-empty clusters
+        # only store non-empty clusters (sharing one empty map while there are none)
+        self.cluster = _NO_CLUSTERS
+
+        # summary of which clusters are non-empty -- only created once an element is stored in a
+        #   cluster, and dropped again when the last one is deleted. A structure holding a single
+        #   element (or any base case structure) keeps it in min/max alone
+        self.summary = None
+
+    """
+    Creates a new Van-Embde-Boas structure holding the integers of a sorted list, building every
+        cluster and summary bottom-up in one pass instead of inserting the integers one at a time.
+        The result is the same as inserting them with insertAll
+
+    :type A: Iterable[int], in non-decreasing order (duplicates are ignored), where each int x in A
+                            has 0 <= x <= u-1
+    :type u: int, same as the constructor
+    :type leafSize: int, same as the constructor
+    :type validate: bool, same as the constructor -- if False, A is also trusted to be sorted
+    :rtype: VEB
+    """
+    @classmethod
+    def fromSorted(cls, A, u=2**32, leafSize=256, validate=True):
+        veb = cls(u, leafSize, validate)
+
+        # validate and dedupe in one pass
+        keys = []
+        for a in A:
+            if validate:
+                validInput, err_msg = veb._validX(a)
+                assert (validInput), err_msg
+                if keys:
+                    assert (a >= keys[-1]), "{} is out of order (after {})".format(a, keys[-1])
+            if keys and a == keys[-1]:
+                continue
+            keys.append(a)
+
+        # the build allocates a node per cluster and summary, which would trigger the cyclic
+        #   garbage collector over and over -- nodes never form cycles, so pause it meanwhile
+        veb.level.size = len(keys)
+        if keys:
+            gcWasEnabled = gc.isenabled()
+            gc.disable()
+            try:
+                veb._buildSorted(keys)
+            finally:
+                if gcWasEnabled:
+                    gc.enable()
+        return veb
+
+    """
+    Fill an empty structure with the integers of a sorted list
+
+    :type keys: List[int], non-empty, in increasing order, where each int x has 0 <= x <= u-1
+    :rtype: void
+    """
+    def _buildSorted(self, keys):
+        self.min = keys[0]
+        self.max = keys[-1]
+
+        # min alone is not stored recursively, and the base case is fully described by min/max
+        if len(keys) == 1 or self.level.u == self.SMALLEST_U:
+            return
         self.cluster = {}
-        
-        if self.u == self.SMALLEST_U:
-            # summary vec is just a list for base case
-            self.summary = [-1,-1]
+
+        # split every other integer into its high and low parts
+        highs = [x >> self.level.lowBits for x in keys[1:]]
+        lows = [x & self.level.lowMask for x in keys[1:]]
+
+        # highs are sorted, so each cluster's lows are a contiguous run
+        cluster_ids = []
+        start = 0
+        while start < len(highs):
+            i = highs[start]
+            end = bisect_right(highs, i, start)
+
+            self.cluster[i] = self._newChildFrom(lows, start, end)
+            cluster_ids.append(i)
+
+            start = end
+
+        self.summary = self._newChildFrom(cluster_ids, 0, len(cluster_ids))
+
+    """
+    Creates a new cluster or summary for this structure holding keys[start:end]
+
+    :type keys: List[int], in increasing order
+    :type start: int
+    :type end: int, where start < end
+    :rtype: VEB or _VEBLeaf
+    """
+    def _newChildFrom(self, keys, start, end):
+        child = self._newChild()
+        if end - start == 1 and not self.level.leafChildren:
+            # most children hold a single integer, which only needs min/max set
+            child.min = child.max = keys[start]
         else:
-            self.summary = VEB(int(sqrt(u)))
+            child._buildSorted(keys[start:end])
+        return child
 
     """
     Insert all integers in a list into the datastructure
@@ -63,6 +222,72 @@ class VEB(object):
         for a in A:
             self.insert(a)
 
+    """
+    Check if x is stored in the structure
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool
+    """
+    def member(self, x):
+        if self.level.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        return self._member(x)
+
+    """
+    Member, without validating x
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool
+    """
+    def _member(self, x):
+        # min is not stored recursively, and max is stored in min/max alone when the structure
+        #   holds a single element (or is a base case structure)
+        if x == self.min or x == self.max:
+            return True
+
+        if self.summary is None: # nothing is stored in any cluster
+            return False
+
+        i = self._high(x)
+        return i in self.cluster and self.cluster[i]._member(self._low(x))
+
+    """
+    Check if x is stored in the structure, as member would
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool
+    """
+    def __contains__(self, x):
+        return self.member(x)
+
+    """
+    Obtain the number of integers in the structure
+
+    :rtype: int
+    """
+    def __len__(self):
+        return self.level.size
+
+    """
+    Obtain the smallest element in the structure
+        - if the structure is empty, return -1
+
+    :rtype: int
+    """
+    def getMin(self):
+        return -1 if self.min is None else self.min
+
+    """
+    Obtain the largest element in the structure
+        - if the structure is empty, return -1
+
+    :rtype: int
+    """
+    def getMax(self):
+        return -1 if self.max is None else self.max
+
     """
     Obtain the smallest element (not including x) in the structure that is greater than x
        - if the successor does not exist, return -1
@@ -71,16 +296,26 @@ class VEB(object):
     :rtype: int
     """
     def successor(self, x):
-        validInput, err_msg = self._validX(x)
-        assert (validInput), err_msg
+        if self.level.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        return self._successor(x)
+
+    """
+    Successor, without validating x
 
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def _successor(self, x):
         if self.min is not None and x < self.min:
             return self.min
 
         # base case
-        if self.u == self.SMALLEST_U:
-            # only return 1 if input is 0 and 1 exists in summary
-            if x == 0 and 1 in self.summary:
+        if self.level.u == self.SMALLEST_U:
+            # only return 1 if input is 0 and 1 exists (as max)
+            if x == 0 and self.max == 1:
                 return 1
             else:
                 return -1
@@ -91,10 +326,13 @@ class VEB(object):
         # check if successor exists in cluster i
         if i in self.cluster and self.cluster[i].max is not None and self._low(x) < self.cluster[i].max:
             # if so, get it
-            j = self.cluster[i].successor(self._low(x))
+            j = self.cluster[i]._successor(self._low(x))
         else:
+            if self.summary is None: # nothing is stored in any cluster
+                return -1
+
             # find correct cluster index for successor
-            i = self.summary.successor(self._high(x))
+            i = self.summary._successor(self._high(x))
 
             if i not in self.cluster: # couldn't find correct successor cluster
                 return -1
@@ -104,6 +342,42 @@ class VEB(object):
 
         return self._index(i, j)
 
+    """
+    Obtain the successor of every query in a sorted list, as successor would. Neighbouring
+        queries share their descent: queries with the same high part are split once and sent
+        down to their cluster together, and every query that misses its cluster is answered by
+        one batched query on the summary
+
+    :type xs: Iterable[int], in non-decreasing order, where each int x in xs has 0 <= x <= u-1
+    :rtype: List[int] -- the successor of xs[k] (or -1) at index k
+    """
+    def successorMany(self, xs):
+        xs = list(xs)
+        if self.level.validate:
+            validInput, err_msg = self._validSortedQueries(xs)
+            assert (validInput), err_msg
+
+        if not self._worthBatching(xs):
+            return [self._successor(x) for x in xs]
+        return self._successorMany(xs)
+
+    """
+    Obtain the predecessor of every query in a sorted list, as predecessor would, sharing the
+        descent between neighbouring queries like successorMany
+
+    :type xs: Iterable[int], in non-decreasing order, where each int x in xs has 0 <= x <= u-1
+    :rtype: List[int] -- the predecessor of xs[k] (or -1) at index k
+    """
+    def predecessorMany(self, xs):
+        xs = list(xs)
+        if self.level.validate:
+            validInput, err_msg = self._validSortedQueries(xs)
+            assert (validInput), err_msg
+
+        if not self._worthBatching(xs):
+            return [self._predecessor(x) for x in xs]
+        return self._predecessorMany(xs)
+
     """
     Obtain the largest element (not including x) in the structure that is smaller than x
         - if the predecessor does not exist, return -1
@@ -112,17 +386,27 @@ class VEB(object):
     :rtype: int
     """
     def predecessor(self, x):
-        validInput, err_msg = self._validX(x)
-        assert (validInput), err_msg
+        if self.level.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        return self._predecessor(x)
+
+    """
+    Predecessor, without validating x
 
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def _predecessor(self, x):
         # if bigger than max, then predecessor is max
         if self.max is not None and x > self.max:
             return self.max
 
         # base case
-        if self.u == self.SMALLEST_U:
-            # only return 0 if input is 1 and 0 exists in summary
-            if x == 1 and 0 in self.summary:
+        if self.level.u == self.SMALLEST_U:
+            # only return 0 if input is 1 and 0 exists (as min)
+            if x == 1 and self.min == 0:
                 return 0
             else:
                 return -1
@@ -133,9 +417,9 @@ class VEB(object):
         # check if predecessor exists in cluster i
         if i in self.cluster and self.cluster[i].min is not None and self._low(x) > self.cluster[i].min:
             # if so, get it
-            j = self.cluster[i].predecessor(self._low(x))
+            j = self.cluster[i]._predecessor(self._low(x))
         else: # predecessor not in cluster i, so look for correct cluster in summary
-            i = self.summary.predecessor(i)
+            i = -1 if self.summary is None else self.summary._predecessor(i)
 
             if i not in self.cluster: # couldn't find correct predecessor cluster
                 # possible that predecessor is self.min (since it's not stored recursively)
@@ -149,6 +433,148 @@ class VEB(object):
 
         return self._index(i, j)
 
+    """
+    Check if a batch of sorted queries shares enough of its descent to be worth grouping --
+        queries spread over more than m/2 clusters share too little to pay for the grouping
+
+    :type xs: List[int], in non-decreasing order, where each int x in xs has 0 <= x <= u-1
+    :rtype: bool
+    """
+    def _worthBatching(self, xs):
+        lowBits = self.level.lowBits
+        return 2 * len(set([x >> lowBits for x in xs])) <= len(xs)
+
+    """
+    Batched successor, without validating the queries
+
+    :type xs: List[int], in non-decreasing order, where each int x in xs has 0 <= x <= u-1
+    :rtype: List[int]
+    """
+    def _successorMany(self, xs):
+
+        results = [-1] * len(xs)
+        if self.min is None:
+            return results
+
+        # queries smaller than min all have min as their successor
+        start = bisect_left(xs, self.min)
+        for k in range(start):
+            results[k] = self.min
+
+        # base case
+        if self.level.u == self.SMALLEST_U:
+            for k in range(start, len(xs)):
+                if xs[k] == 0 and self.max == 1:
+                    results[k] = 1
+            return results
+
+        if self.summary is None: # nothing is stored in any cluster
+            return results
+
+        # runs of queries with the same high part (queries are sorted, so the runs are
+        #   contiguous), whose successor is not in their own cluster
+        #   (shift and mask inlined, since this loop runs once per run at every level)
+        lowBits = self.level.lowBits
+        lowMask = self.level.lowMask
+        missed = []
+        k = start
+        while k < len(xs):
+            i = xs[k] >> lowBits
+            end = bisect_left(xs, (i + 1) << lowBits, k)
+
+            # queries below the cluster's max have their successor inside it
+            hit = k
+            child = self.cluster.get(i)
+            if child is not None:
+                lows = [x & lowMask for x in xs[k:end]]
+                hit += bisect_left(lows, child.max)
+                if hit > k:
+                    offset = i << lowBits
+                    for m, j in enumerate(child._successorMany(lows[:hit - k])):
+                        results[k + m] = offset | j
+
+            if hit < end:
+                missed.append((i, hit, end))
+            k = end
+
+        # every missed run's successor is the smallest element of the next cluster
+        if missed:
+            nextClusters = self.summary._successorMany([i for i, _, _ in missed])
+            for (_, hit, end), i in zip(missed, nextClusters):
+                if i != -1:
+                    successor = self._index(i, self.cluster[i].min)
+                    for k in range(hit, end):
+                        results[k] = successor
+
+        return results
+
+    """
+    Batched predecessor, without validating the queries
+
+    :type xs: List[int], in non-decreasing order, where each int x in xs has 0 <= x <= u-1
+    :rtype: List[int]
+    """
+    def _predecessorMany(self, xs):
+
+        results = [-1] * len(xs)
+        if self.min is None:
+            return results
+
+        # queries bigger than max all have max as their predecessor
+        stop = bisect_right(xs, self.max)
+        for k in range(stop, len(xs)):
+            results[k] = self.max
+
+        # base case
+        if self.level.u == self.SMALLEST_U:
+            for k in range(stop):
+                if xs[k] == 1 and self.min == 0:
+                    results[k] = 0
+            return results
+
+        # runs of queries with the same high part, whose predecessor is not in their own cluster
+        lowBits = self.level.lowBits
+        lowMask = self.level.lowMask
+        missed = []
+        k = 0
+        while k < stop:
+            i = xs[k] >> lowBits
+            end = bisect_left(xs, (i + 1) << lowBits, k, stop)
+
+            # queries above the cluster's min have their predecessor inside it
+            hit = end
+            child = self.cluster.get(i)
+            if child is not None:
+                lows = [x & lowMask for x in xs[k:end]]
+                hit = k + bisect_right(lows, child.min)
+                if hit < end:
+                    offset = i << lowBits
+                    for m, j in enumerate(child._predecessorMany(lows[hit - k:])):
+                        results[hit + m] = offset | j
+
+            if k < hit:
+                missed.append((i, k, hit))
+            k = end
+
+        # every missed run's predecessor is the largest element of the previous cluster, or min
+        #   (which is not stored recursively) if there is no previous cluster
+        if missed:
+            if self.summary is None:
+                prevClusters = [-1] * len(missed)
+            else:
+                prevClusters = self.summary._predecessorMany([i for i, _, _ in missed])
+            for (_, start, hit), i in zip(missed, prevClusters):
+                if i != -1:
+                    predecessor = self._index(i, self.cluster[i].max)
+                    for k in range(start, hit):
+                        results[k] = predecessor
+                else:
+                    for k in range(start, hit):
+                        if xs[k] > self.min:
+                            results[k] = self.min
+
+        return results
+
     """
     Insert a new integer x into the datastructure
 
@@ -156,8 +582,24 @@ class VEB(object):
     :rtype: void
     """
     def insert(self, x):
-        validInput, err_msg = self._validX(x)
-        assert (validInput), err_msg
+        if self.level.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        if self._insert(x):
+            self.level.size += 1
+
+    """
+    Insert, without validating x
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool -- True if x was not already stored
+    """
+    def _insert(self, x):
+        # x is already stored as the minimum (which must not also be stored recursively), or as
+        #   the maximum
+        if x == self.min or x == self.max:
+            return False
 
         # update max normally
         if self.max is None or x > self.max:
@@ -167,17 +609,14 @@ class VEB(object):
         if self.min is None:
             self.min = x
             self.max = x
-
-            # ... except if we are in the base case, in which case we must update
-            #   the summary structure
-            if self.u != self.SMALLEST_U:
-                return
+            return True
 
         # base case
-        if self.u == self.SMALLEST_U:
-            # simply add x to summary list
-            self.summary[x] = x
-            return
+        if self.level.u == self.SMALLEST_U:
+            # min and max alone describe every subset of {0, 1}
+            if x < self.min:
+                self.min = x
+            return True
 
         # don't recursively store minimums, by swapping out current minimum with x
         if x < self.min:
@@ -192,14 +631,17 @@ class VEB(object):
 
         # inserting into cluster i, so create it if it doesn't already exist
         if i not in self.cluster:
-            self.cluster[i] = VEB(int(sqrt(self.u)))
+            # update summary when i's cluster is new (creating the summary and cluster map if
+            #   this is the first element stored in any cluster)
+            if self.summary is None:
+                self.summary = self._newChild()
+                self.cluster = {}
+            self.summary._insert(i)
 
-        if self.cluster[i].min is None:
-            # update summary when i's cluster is empty
-            self.summary.insert(i)
+            self.cluster[i] = self._newChild()
 
         # insert into cluster
-        self.cluster[i].insert(j)
+        return self.cluster[i]._insert(j)
 
     """
     Deletes an integer x from the datastructure. If x is not in the datastructure, then 
@@ -209,34 +651,65 @@ class VEB(object):
     :rtype: void
     """
     def delete(self, x):
-        validInput, err_msg = self._validX(x)
-        assert (validInput), err_msg
+        if self.level.validate:
+            validInput, err_msg = self._validX(x)
+            assert (validInput), err_msg
+
+        if self._delete(x):
+            self.level.size -= 1
+
+    """
+    Delete, without validating x
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool -- True if x was stored
+    """
+    def _delete(self, x):
+        # base case
+        if self.level.u == self.SMALLEST_U:
+            # min and max alone describe every subset of {0, 1}
+            if x == self.min and x == self.max:
+                self.min = None
+                self.max = None
+            elif x == self.min:
+                self.min = self.max
+            elif x == self.max:
+                self.max = self.min
+            else:
+                return False
+            return True
 
         if x == self.min:
-            i = self.summary.min
-            if i is None: # check if all clusters are empty, and if so
+            if self.summary is None: # check if all clusters are empty, and if so
                 # set min and max flags to None (deleted last element)
                 self.min = None
                 self.max = None
-                return
+                return True
             # not all clusters are empty, so find next minimum element in DS, and set it to new min
+            i = self.summary.min
             self.min = self._index(i, self.cluster[i].min)
             # that new minimum was stored recursively, but it's our invariant that the min isn't stored recursively. So set x to be the new minimum, and fall off to rest of delete code
             x = self.min
 
-        # recursively delete x from it's cluster, if it exists
-        if self._high(x) in self.cluster:
-            self.cluster[self._high(x)].delete(self._low(x))
-
-            # check if we deleted the last item in cluster
-            if self.cluster[self._high(x)].min is None:
-                # if we did, have to update the summary structure
-                self.summary.delete(self._high(x))
+        # recursively delete x from it's cluster, if it exists (it always does when x is the
+        #   promoted minimum)
+        if self._high(x) not in self.cluster or not self.cluster[self._high(x)]._delete(self._low(x)):
+            return False
+
+        # check if we deleted the last item in cluster
+        if self.cluster[self._high(x)].min is None:
+            # if we did, drop the cluster and update the summary structure (dropping that
+            #   too if it's now empty)
+            del self.cluster[self._high(x)]
+            self.summary._delete(self._high(x))
+            if self.summary.min is None:
+                self.summary = None
+                self.cluster = _NO_CLUSTERS
 
         # possible that we recursively deleted the max, and must find new max
         if x == self.max:
             # check if there is any new max to find
-            if self.summary.max is None:
+            if self.summary is None:
                 # if not, then max is simply self.min
                 self.max = self.min
             else:
@@ -244,6 +717,236 @@ class VEB(object):
                 i = self.summary.max
                 self.max = self._index(i, self.cluster[i].max)
 
+        return True
+
+    """
+    Iterate over every integer in the structure, in increasing order
+
+    :rtype: Iterator[int]
+    """
+    def __iter__(self):
+        return self._iterRange(0, self.level.u, 0)
+
+    """
+    Iterate over every integer in the structure, in decreasing order
+
+    :rtype: Iterator[int]
+    """
+    def __reversed__(self):
+        return self._iterRangeReversed(0, self.level.u, 0)
+
+    """
+    Iterate over every integer x in the structure with lo <= x < hi, walking the clusters in order
+        instead of calling successor once per integer
+        - reporting k integers costs O( (k + 1) * lg(lg(u)) ) worst case, and less when they
+            share clusters (see the module docstring)
+
+    :type lo: int, where 0 <= lo <= u
+    :type hi: int, where 0 <= hi <= u (the range is empty if hi <= lo)
+    :type reverse: bool -- iterate in decreasing order instead
+    :rtype: Iterator[int]
+    """
+    def iterRange(self, lo, hi, reverse=False):
+        if self.level.validate:
+            validInput, err_msg = self._validRange(lo, hi)
+            assert (validInput), err_msg
+
+        if reverse:
+            return self._iterRangeReversed(lo, hi, 0)
+        return self._iterRange(lo, hi, 0)
+
+    """
+    Count the integers x in the structure with lo <= x < hi
+        - counting k integers costs the same as iterating over them with iterRange
+
+    :type lo: int, where 0 <= lo <= u
+    :type hi: int, where 0 <= hi <= u (the range is empty if hi <= lo)
+    :rtype: int
+    """
+    def countRange(self, lo, hi):
+        count = 0
+        for _ in self.iterRange(lo, hi):
+            count += 1
+        return count
+
+    """
+    Yield offset + x for every integer x in the structure with lo <= x < hi, in increasing order.
+        Clusters yield absolute values through their offset, so each integer is produced once at
+        the level that stores it and passed up by yield from without recombining its parts
+
+    :type lo: int
+    :type hi: int
+    :type offset: int
+    :rtype: Iterator[int]
+    """
+    def _iterRange(self, lo, hi, offset):
+        if self.min is None or lo >= hi or hi <= self.min or self.max < lo:
+            return
+
+        # min is not stored recursively, and it comes before everything in the clusters
+        if lo <= self.min:
+            yield offset + self.min
+
+        # base case
+        if self.level.u == self.SMALLEST_U:
+            if self.max != self.min and lo <= self.max < hi:
+                yield offset + self.max
+            return
+
+        if self.summary is None:
+            return
+
+        # only the first and last clusters are cut by the range, every cluster between them is
+        #   walked in full
+        first = self._high(lo)
+        last = self._high(hi - 1)
+        for i in self.summary._iterRange(first, last + 1, 0):
+            clusterLo = self._low(lo) if i == first else 0
+            clusterHi = self._low(hi - 1) + 1 if i == last else 1 << self.level.lowBits
+            yield from self.cluster[i]._iterRange(clusterLo, clusterHi, offset + (i << self.level.lowBits))
+
+    """
+    Yield offset + x for every integer x in the structure with lo <= x < hi, in decreasing order
+
+    :type lo: int
+    :type hi: int
+    :type offset: int
+    :rtype: Iterator[int]
+    """
+    def _iterRangeReversed(self, lo, hi, offset):
+        if self.min is None or lo >= hi or hi <= self.min or self.max < lo:
+            return
+
+        # base case
+        if self.level.u == self.SMALLEST_U:
+            if self.max != self.min and self.max < hi:
+                yield offset + self.max
+            if lo <= self.min:
+                yield offset + self.min
+            return
+
+        if self.summary is not None:
+            first = self._high(lo)
+            last = self._high(hi - 1)
+            for i in self.summary._iterRangeReversed(first, last + 1, 0):
+                clusterLo = self._low(lo) if i == first else 0
+                clusterHi = self._low(hi - 1) + 1 if i == last else 1 << self.level.lowBits
+                yield from self.cluster[i]._iterRangeReversed(clusterLo, clusterHi, offset + (i << self.level.lowBits))
+
+        # min is not stored recursively, and it comes after everything in the clusters
+        if lo <= self.min:
+            yield offset + self.min
+
+    """
+    Start collecting statistics on every operation: per-operation counts and recursion depths,
+        visits per level, and the clusters, summaries and nodes created and dropped. Statistics
+        are kept by switching every node of the structure to an instrumented class, so a structure
+        that never enables them runs exactly the same code as before
+        - enabling takes O( number of nodes ), to switch the existing nodes
+
+    :type callback: Callable[[string, int, int, int], void] -- optional, called after every
+                        successor, predecessor, insert, delete and member with the operation name,
+                        its input, its recursion depth and the number of clusters, summaries and
+                        leaves it created
+    :rtype: void
+    """
+    def enableStats(self, callback=None):
+        stats = _VEBStats(len(self._levels()) + 1, callback)
+        for level in self._levels():
+            level.stats = stats
+        self._setNodeClass(_ProfiledVEB)
+
+    """
+    Stop collecting statistics, switching every node back to the uninstrumented class, and
+        discard the statistics collected so far
+
+    :rtype: void
+    """
+    def disableStats(self):
+        self._setNodeClass(VEB)
+        for level in self._levels():
+            level.stats = None
+
+    """
+    Obtain a snapshot of the statistics collected since enableStats. Lists are indexed by level,
+        where the structure itself is level 0, its clusters and summary are level 1, and so on
+        - "ops": number of calls of each operation
+        - "depths": histogram of the recursion depth (number of levels of recursive structures
+            reached) of each operation
+        - "visits": number of recursive calls into the structures of each level
+        - "nodesCreated", "leavesCreated": structures allocated on each level
+        - "clustersCreated", "clustersDropped", "summariesCreated", "summariesDropped": changes to
+            the clusters and summaries owned by the structures of each level. The summary of a
+            level is updated once per cluster created or dropped
+
+    :rtype: dict, or None if statistics are not enabled
+    """
+    def getStats(self):
+        stats = self.level.stats
+        if stats is None:
+            return None
+        return stats.snapshot()
+
+    """
+    Count the structures making up this one on each level, by walking all of them
+        - takes O( number of nodes ), and works whether or not statistics are enabled
+
+    :rtype: List[dict] -- for each level: its universe size "u", the number of recursive "nodes"
+                          and bitset "leaves" on it, and the total number of "clusters" and
+                          "summaries" those nodes hold
+    """
+    def getCensus(self):
+        census = []
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            while len(census) <= depth:
+                census.append({"u": node.u, "nodes": 0, "leaves": 0, "clusters": 0, "summaries": 0})
+            row = census[depth]
+
+            if type(node) is _VEBLeaf:
+                row["leaves"] += 1
+                continue
+            row["nodes"] += 1
+            row["clusters"] += len(node.cluster)
+            if node.summary is not None:
+                row["summaries"] += 1
+                stack.append((node.summary, depth + 1))
+            for cluster in node.cluster.values():
+                stack.append((cluster, depth + 1))
+        return census
+
+    """
+    Obtain the level descriptors of this structure, from the top level down
+
+    :rtype: List[_VEBLevel]
+    """
+    def _levels(self):
+        levels = []
+        level = self.level
+        while level is not None:
+            levels.append(level)
+            level = level.child
+        return levels
+
+    """
+    Switch the class of every recursive node in this structure -- nodes of VEB and its
+        instrumented subclass have the same layout, so they can be switched in place
+
+    :type cls: type, VEB or _ProfiledVEB
+    :rtype: void
+    """
+    def _setNodeClass(self, cls):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.__class__ = cls
+            for child in node.cluster.values():
+                if type(child) is not _VEBLeaf:
+                    stack.append(child)
+            if node.summary is not None and type(node.summary) is not _VEBLeaf:
+                stack.append(node.summary)
+
     """
     Obtain a representation of the VEB
     """
@@ -259,13 +962,13 @@ class VEB(object):
     def _toStringUtil(self, tab=0):
         s = ""
 
-        s += "\t"*tab + "u: {}\n".format(self.u)
+        s += "\t"*tab + "u: {}\n".format(self.level.u)
         s += "\t"*tab + "min: {}\n".format(self.min)
         s += "\t"*tab + "max: {}\n".format(self.max)
         s += "\t"*tab + "summary:\n"
  
-        if self.u == self.SMALLEST_U:
-            s += "\t"*(tab+1) + "{}\n".format(str(self.summary))
+        if self.summary is None:
+            s += "\t"*(tab+1) + "None\n"
         else:
             s += self.summary._toStringUtil(tab+1)
 
@@ -286,9 +989,7 @@ class VEB(object):
     :rtype: int
     """
     def _high(self, x):
-        if x == 0:
-            return 0
-        return x // int(sqrt(self.u))
+        return x >> self.level.lowBits
 
     """
     Extract the last log(sqrt(u)) bits of x, interpreted as a number
@@ -302,9 +1003,7 @@ class VEB(object):
     :rtype: int
     """
     def _low(self, x):
-        if x == 0:
-            return 0
-        return x % int(sqrt(self.u))
+        return x & self.level.lowMask
 
     """
     Recombine the high and low parts of the number into its original value, given that
@@ -323,7 +1022,7 @@ class VEB(object):
     def _index(self, h, l):
         if h == -1 or l == -1:
             return -1
-        return int(h * sqrt(self.u) + l)
+        return (h << self.level.lowBits) | l
 
     """
     Check if u is an int where u = 2^2^k for some nonnegative int k
@@ -334,7 +1033,7 @@ class VEB(object):
     def _validU(self, u):
         # check if u is an int
         if type(u) is not int:
-            err_msg = "{} is not an integer".format(x)
+            err_msg = "{} is not an integer".format(u)
             return False, err_msg
 
         # check if u is a power of 2
@@ -343,7 +1042,7 @@ class VEB(object):
             return False, err_msg
 
         # check if exponent is a power of 2
-        exponent = int(log(u, 2))
+        exponent = u.bit_length() - 1
         if not self._isPowerOf2(exponent):
             err_msg = "{} is not a power of 2".format(exponent)
             return False, err_msg
@@ -351,6 +1050,26 @@ class VEB(object):
         # passed all checks
         return True, ""
         
+    """
+    Check if leafSize is an int where leafSize = 2^k for some nonnegative int k
+
+    :type leafSize: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validLeafSize(self, leafSize):
+        # check if leafSize is an int
+        if type(leafSize) is not int:
+            err_msg = "{} is not an integer".format(leafSize)
+            return False, err_msg
+
+        # check if leafSize is a power of 2
+        if leafSize < 1 or not self._isPowerOf2(leafSize):
+            err_msg = "{} is not a power of 2".format(leafSize)
+            return False, err_msg
+
+        # passed all checks
+        return True, ""
+
     """
     Check if x has x = 2^k for some nonnegative int k
     :type x: int
@@ -360,6 +1079,49 @@ class VEB(object):
         # power of 2 is defined by having exactly 1 set bit in binary representation
         return bin(x).count("1") == 1
     
+    """
+    Check if lo and hi are ints in the range {0, 1, ... u}
+    :type lo: Undefined
+    :type hi: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validRange(self, lo, hi):
+        for bound in (lo, hi):
+            # check if bound is an int
+            if type(bound) is not int:
+                err_msg = "{} is not an integer".format(bound)
+                return False, err_msg
+
+            # check if bound is in the valid range
+            if bound < 0 or self.level.u < bound:
+                err_msg = "{} is not in the range 0...{}".format(bound, self.level.u)
+                return False, err_msg
+
+        # passed all checks
+        return True, ""
+
+    """
+    Check if xs holds ints in the range {0, 1, ... u-1}, in non-decreasing order
+    :type xs: List[Undefined]
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validSortedQueries(self, xs):
+        prev = 0
+        for x in xs:
+            # check if each query is valid on its own
+            validInput, err_msg = self._validX(x)
+            if not validInput:
+                return False, err_msg
+
+            # check if queries are sorted
+            if x < prev:
+                err_msg = "{} is out of order (after {})".format(x, prev)
+                return False, err_msg
+            prev = x
+
+        # passed all checks
+        return True, ""
+
     """
     Check if x is an int in the range {0, 1, ... u-1}
     :type x: Undefined
@@ -372,10 +1134,424 @@ class VEB(object):
             return False, err_msg
 
         # check if x is in the valid range
-        if x < 0 or self.u <= x:
-            err_msg = "{} is not in the range 0...{}".format(x, self.u-1)
+        if x < 0 or self.level.u <= x:
+            err_msg = "{} is not in the range 0...{}".format(x, self.level.u-1)
             return False, err_msg
 
         # passed all checks
         return True, ""
 
+
+"""
+Shape of one level of recursion of a VEB structure -- everything that depends only on the universe
+    size and the settings of the structure, shared by every node of the level instead of copied
+    into each one
+"""
+class _VEBLevel(object):
+    __slots__ = ("u", "validate", "size", "depth", "stats", "lowBits", "lowMask", "leafChildren", "child")
+
+    """
+    Creates the descriptor of a level over {0, 1, ... u-1}, along with the descriptors of every
+        level below it
+
+    :type u: int, such that u = 2^2^k where k is a NONNEGATIVE integer
+    :type leafSize: int, a power of 2
+    :type validate: bool -- whether the public methods of the structure check their input
+    :type depth: int -- number of levels above this one
+    """
+    def __init__(self, u, leafSize, validate, depth=0):
+        self.u = u
+        self.validate = validate
+
+        # number of integers in the structure -- only tracked by the top level, whose single node
+        #   is the structure itself
+        self.size = 0
+
+        self.depth = depth
+
+        # statistics of the structure, shared by all of its levels (None unless enabled)
+        self.stats = None
+
+        # x splits into high and low halves of lowBits = lg(sqrt(u)) bits each, so clusters and
+        #   the summary both have universe size sqrt(u) = 2^lowBits
+        self.lowBits = (u.bit_length() - 1) // 2
+        self.lowMask = (1 << self.lowBits) - 1
+
+        # clusters and summary are bitset leaves once their universe is small enough
+        self.leafChildren = (1 << self.lowBits) <= leafSize
+
+        # level of the clusters and summary (None below the base case, or when they are leaves)
+        self.child = None
+        if u > VEB.SMALLEST_U and not self.leafChildren:
+            self.child = _VEBLevel(1 << self.lowBits, leafSize, validate, depth + 1)
+
+"""
+Bitset leaf of a VEB structure -- a cluster or summary over a small universe, storing its integers
+    as the set bits of one int so that every operation is a few bit tricks instead of a recursion.
+    Leaves are only created by VEB, which validates every integer before it reaches them
+
+Runtimes:
+    - successor: O( u / w ), where w is the machine word size -- O(1) for leaves of at most w integers
+    - predecessor: O( u / w )
+    - insert: O( u / w )
+    - delete: O( u / w )
+"""
+class _VEBLeaf(object):
+    __slots__ = ("u", "bits", "min", "max")
+
+    """
+    Creates a new, empty leaf over {0, 1, ... u-1}
+
+    :type u: int
+    """
+    def __init__(self, u):
+        self.u = u
+
+        # bit x is set when x is stored
+        self.bits = 0
+
+        # kept up to date for the parent structure, which reads them directly
+        self.min = None
+        self.max = None
+
+    """
+    Fill an empty leaf with the integers of a sorted list
+
+    :type keys: List[int], non-empty, in increasing order, where each int x has 0 <= x <= u-1
+    :rtype: void
+    """
+    def _buildSorted(self, keys):
+        bits = 0
+        for x in keys:
+            bits |= 1 << x
+        self.bits = bits
+        self.min = keys[0]
+        self.max = keys[-1]
+
+    """
+    Obtain the smallest element in the leaf that is greater than x, or -1 if there is none
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def _successor(self, x):
+        above = self.bits >> (x + 1)
+        if above == 0:
+            return -1
+        # above & -above isolates the lowest set bit
+        return x + (above & -above).bit_length()
+
+    """
+    Obtain the largest element in the leaf that is smaller than x, or -1 if there is none
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def _predecessor(self, x):
+        below = self.bits & ((1 << x) - 1)
+        return below.bit_length() - 1
+
+    """
+    Check if x is stored in the leaf
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool
+    """
+    def _member(self, x):
+        return (self.bits >> x) & 1 != 0
+
+    """
+    Insert x into the leaf
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool -- True if x was not already stored
+    """
+    def _insert(self, x):
+        bit = 1 << x
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        return True
+
+    """
+    Delete x from the leaf, doing nothing if it isn't stored
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: bool -- True if x was stored
+    """
+    def _delete(self, x):
+        bit = 1 << x
+        if not self.bits & bit:
+            return False
+        self.bits ^= bit
+
+        if self.bits == 0:
+            self.min = None
+            self.max = None
+        else:
+            if x == self.min:
+                self.min = (self.bits & -self.bits).bit_length() - 1
+            if x == self.max:
+                self.max = self.bits.bit_length() - 1
+        return True
+
+    """
+    Batched successor -- leaves have no descent to share, so each query is answered on its own
+
+    :type xs: List[int]
+    :rtype: List[int]
+    """
+    def _successorMany(self, xs):
+        return [self._successor(x) for x in xs]
+
+    """
+    Batched predecessor -- leaves have no descent to share, so each query is answered on its own
+
+    :type xs: List[int]
+    :rtype: List[int]
+    """
+    def _predecessorMany(self, xs):
+        return [self._predecessor(x) for x in xs]
+
+    """
+    Yield offset + x for every integer x in the leaf with lo <= x < hi, in increasing order
+
+    :type lo: int
+    :type hi: int
+    :type offset: int
+    :rtype: Iterator[int]
+    """
+    def _iterRange(self, lo, hi, offset):
+        if lo >= hi:
+            return
+        window = (self.bits >> lo) & ((1 << (hi - lo)) - 1)
+        offset += lo - 1
+        while window:
+            lowest = window & -window
+            yield offset + lowest.bit_length()
+            window ^= lowest
+
+    """
+    Yield offset + x for every integer x in the leaf with lo <= x < hi, in decreasing order
+
+    :type lo: int
+    :type hi: int
+    :type offset: int
+    :rtype: Iterator[int]
+    """
+    def _iterRangeReversed(self, lo, hi, offset):
+        if lo >= hi:
+            return
+        window = (self.bits >> lo) & ((1 << (hi - lo)) - 1)
+        offset += lo
+        while window:
+            highest = window.bit_length() - 1
+            yield offset + highest
+            window ^= 1 << highest
+
+    """
+    Helper function to get a representation of the leaf state
+
+    :type tab: int
+    """
+    def _toStringUtil(self, tab=0):
+        s = ""
+        s += "\t"*tab + "u: {}\n".format(self.u)
+        s += "\t"*tab + "elements: {}\n".format(list(self._iterRange(0, self.u, 0)))
+        return s
+
+"""
+Statistics collected by an instrumented VEB structure, shared by all of its levels
+"""
+class _VEBStats(object):
+    """
+    Creates empty statistics
+
+    :type levels: int -- number of levels of the structure, including the level of bitset leaves
+    :type callback: Callable[[string, int, int, int], void], or None
+    """
+    def __init__(self, levels, callback):
+        self.callback = callback
+
+        self.ops = {}
+        self.depths = {}
+
+        self.visits = [0] * levels
+        self.nodesCreated = [0] * levels
+        self.leavesCreated = [0] * levels
+        self.clustersCreated = [0] * levels
+        self.clustersDropped = [0] * levels
+        self.summariesCreated = [0] * levels
+        self.summariesDropped = [0] * levels
+
+        # recursion depth reached and structures created by the operation in progress
+        self.depth = 0
+        self.created = 0
+
+    """
+    Obtain a copy of the statistics, safe to keep while collection continues
+
+    :rtype: dict
+    """
+    def snapshot(self):
+        return {
+            "ops": dict(self.ops),
+            "depths": dict((op, dict(histogram)) for op, histogram in self.depths.items()),
+            "visits": list(self.visits),
+            "nodesCreated": list(self.nodesCreated),
+            "leavesCreated": list(self.leavesCreated),
+            "clustersCreated": list(self.clustersCreated),
+            "clustersDropped": list(self.clustersDropped),
+            "summariesCreated": list(self.summariesCreated),
+            "summariesDropped": list(self.summariesDropped),
+        }
+
+"""
+Instrumented VEB node, used in place of VEB by every node of a structure while its statistics are
+    enabled. Each method records what it does in the statistics of its level, then defers to VEB
+"""
+class _ProfiledVEB(VEB):
+    # same layout as VEB, so nodes can switch between the two classes in place
+    __slots__ = ()
+
+    """
+    Run a public operation, recording its count and recursion depth and notifying the callback
+
+    :type op: string -- name of the operation
+    :type method: Callable[[VEB, int], Any] -- the VEB method implementing it
+    :type x: int
+    :rtype: Any -- result of the operation
+    """
+    def _profileOp(self, op, method, x):
+        stats = self.level.stats
+        stats.depth = 0
+        stats.created = 0
+
+        result = method(self, x)
+
+        stats.ops[op] = stats.ops.get(op, 0) + 1
+        histogram = stats.depths.setdefault(op, {})
+        histogram[stats.depth] = histogram.get(stats.depth, 0) + 1
+        if stats.callback is not None:
+            stats.callback(op, x, stats.depth, stats.created)
+        return result
+
+    """
+    Successor, recorded in the statistics
+    """
+    def successor(self, x):
+        return self._profileOp("successor", VEB.successor, x)
+
+    """
+    Predecessor, recorded in the statistics
+    """
+    def predecessor(self, x):
+        return self._profileOp("predecessor", VEB.predecessor, x)
+
+    """
+    Insert, recorded in the statistics
+    """
+    def insert(self, x):
+        return self._profileOp("insert", VEB.insert, x)
+
+    """
+    Delete, recorded in the statistics
+    """
+    def delete(self, x):
+        return self._profileOp("delete", VEB.delete, x)
+
+    """
+    Member, recorded in the statistics
+    """
+    def member(self, x):
+        return self._profileOp("member", VEB.member, x)
+
+    """
+    Record a recursive call into this node
+
+    :rtype: _VEBStats
+    """
+    def _visit(self):
+        level = self.level
+        stats = level.stats
+        stats.visits[level.depth] += 1
+        if level.depth + 1 > stats.depth:
+            stats.depth = level.depth + 1
+        return stats
+
+    """
+    Unchecked successor, recorded in the statistics of this level
+    """
+    def _successor(self, x):
+        self._visit()
+        return VEB._successor(self, x)
+
+    """
+    Unchecked predecessor, recorded in the statistics of this level
+    """
+    def _predecessor(self, x):
+        self._visit()
+        return VEB._predecessor(self, x)
+
+    """
+    Unchecked member, recorded in the statistics of this level
+    """
+    def _member(self, x):
+        self._visit()
+        return VEB._member(self, x)
+
+    """
+    Unchecked insert, recording the clusters and summary it creates
+    """
+    def _insert(self, x):
+        stats = self._visit()
+        hadSummary = self.summary is not None
+        clusters = len(self.cluster)
+
+        result = VEB._insert(self, x)
+
+        depth = self.level.depth
+        if not hadSummary and self.summary is not None:
+            stats.summariesCreated[depth] += 1
+        if len(self.cluster) > clusters:
+            stats.clustersCreated[depth] += 1
+        return result
+
+    """
+    Unchecked delete, recording the clusters and summary it drops
+    """
+    def _delete(self, x):
+        stats = self._visit()
+        hadSummary = self.summary is not None
+        clusters = len(self.cluster)
+
+        result = VEB._delete(self, x)
+
+        depth = self.level.depth
+        if hadSummary and self.summary is None:
+            stats.summariesDropped[depth] += 1
+        if len(self.cluster) < clusters:
+            stats.clustersDropped[depth] += 1
+        return result
+
+    """
+    Creates a new, empty cluster or summary, instrumented like this node
+
+    :rtype: _ProfiledVEB or _VEBLeaf
+    """
+    def _newChild(self):
+        child = VEB._newChild(self)
+
+        stats = self.level.stats
+        stats.created += 1
+        if type(child) is _VEBLeaf:
+            stats.leavesCreated[self.level.depth + 1] += 1
+        else:
+            child.__class__ = _ProfiledVEB
+            stats.nodesCreated[self.level.depth + 1] += 1
+        return child
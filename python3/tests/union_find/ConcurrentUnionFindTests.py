@@ -0,0 +1,94 @@
+"""
+Test Suite for ConcurrentUnionFind class.
+
+Do NOT run this file by hand -- instead run the "[path-to-dvs_structures]/dvs_structures/python3/tests/run_all.sh" script
+"""
+
+from ConcurrentUnionFind import ConcurrentUnionFind
+from UnionFind import UnionFind
+from threading import Thread
+import random
+import sys
+import unittest
+
+class ConcurrentUnionFindTests(unittest.TestCase):
+    def testMatchesUnionFindSingleThreaded(self):
+        rand = random.Random(0)
+        n = 300
+        pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(250)]
+
+        expected = UnionFind(list(range(n)))
+        for x, y in pairs:
+            expected.union(x, y)
+
+        for uf in (ConcurrentUnionFind(list(range(n))), ConcurrentUnionFind.fromSize(n)):
+            for x, y in pairs:
+                uf.union(x, y)
+
+            self.assertEqual(expected.getRootSizes(), uf.getRootSizes(), "Expected the same representatives and sizes as UnionFind")
+            self.assertEqual(expected.getNumSets(), uf.getNumSets())
+            self.assertEqual(expected.findMany(range(n)), uf.findMany(range(n)))
+
+    def testValidation(self):
+        uf = ConcurrentUnionFind(["a", "b"])
+
+        self.assertRaises(AssertionError, uf.union, "a", "z")
+        self.assertRaises(AssertionError, uf.getSize, "z")
+        self.assertRaises(AssertionError, ConcurrentUnionFind.fromSize(3).find, -1)
+
+    def testConcurrentUnionsAndFinds(self):
+        rand = random.Random(1)
+        n = 2000
+        num_threads = 8
+        chunks = [[(rand.randrange(n), rand.randrange(n)) for _ in range(1500)] for _ in range(num_threads)]
+
+        for uf in (ConcurrentUnionFind(["e{}".format(i) for i in range(n)]), ConcurrentUnionFind.fromSize(n)):
+            elements = list(uf.elements)
+            errors = []
+
+            def unionWorker(chunk):
+                try:
+                    for k, (x, y) in enumerate(chunk):
+                        if k % 2:
+                            uf.union(elements[x], elements[y])
+                        else:
+                            uf.unionMany([elements[x]], [elements[y]])
+                except Exception as e:
+                    errors.append(e)
+
+            def findWorker():
+                try:
+                    for _ in range(3):
+                        for el in elements:
+                            self.assertTrue(uf.find(el) in uf.map)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [Thread(target=unionWorker, args=(chunk,)) for chunk in chunks] + [Thread(target=findWorker) for _ in range(2)]
+
+            # switch threads as often as possible, to interleave unions and finds
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            try:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            finally:
+                sys.setswitchinterval(interval)
+
+            self.assertEqual([], errors)
+
+            expected = UnionFind(list(range(n)))
+            for chunk in chunks:
+                expected.unionMany(*zip(*chunk))
+
+            expected_sets = sorted(sorted(elements[i] for i in members) for members in expected.iterSets())
+            self.assertEqual(expected_sets, sorted(map(sorted, uf.iterSets())), "Expected concurrent unions to produce the same sets")
+            self.assertEqual(expected.getNumSets(), uf.getNumSets())
+            self.assertEqual(expected.getNumSets(), len(uf.getRoots()))
+            for members in uf.iterSets():
+                self.assertEqual(len(members), uf.getSize(members[0]))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -4,7 +4,12 @@ Test Suite for UnionFind class.
 Do NOT run this file by hand -- instead run the "[path-to-dvs_structures]/dvs_structures/python3/tests/run_all.sh" script
 """
 
-from UnionFind import UnionFind
+from UnionFind import UnionFind, _compactForest, _mergeForests
+from array import array
+import multiprocessing
+import os
+import random
+import tempfile
 import unittest
 
 class UnionFindTests(unittest.TestCase):
@@ -131,6 +136,586 @@ class UnionFindTests(unittest.TestCase):
         self.assertEqual(1, uf.getSize(179), "Expected any int outside any range to still have size 1")
         self.assertEqual(1, uf.getSize(196), "Expected any int outside any range to still have size 1")
 
+    def testUnionManyMatchesUnion(self):
+        rand = random.Random(0)
+        elements = list(range(500))
+        xs = [rand.choice(elements) for _ in range(400)]
+        ys = [rand.choice(elements) for _ in range(400)]
+
+        batch = UnionFind(elements)
+        batch.unionMany(xs, ys)
+
+        scalar = UnionFind(elements)
+        for x, y in zip(xs, ys):
+            scalar.union(x, y)
+
+        self.assertEqual(scalar.getRoots(), batch.getRoots(), "Expected batch union to pick the same representatives as scalar union")
+        for el in elements:
+            self.assertEqual(scalar.find(el), batch.find(el), "Expected {} to be in the same set for batch and scalar union".format(el))
+            self.assertEqual(scalar.getSize(el), batch.getSize(el), "Expected {} to have the same set size for batch and scalar union".format(el))
+
+    def testFindMany(self):
+        elements = ["bye", "a", "80", "cat", "dog"]
+        uf = UnionFind(elements)
+
+        self.assertEqual(elements, uf.findMany(elements), "Expected every element to be its own root on init")
+
+        uf.union("a", "80")
+        uf.union("80", "cat")
+
+        roots = uf.findMany(["cat", "bye", "a", "dog", "80"])
+        self.assertEqual([uf.find("cat"), "bye", uf.find("a"), "dog", uf.find("80")], roots)
+        self.assertEqual(roots[0], roots[2])
+        self.assertEqual(roots[0], roots[4])
+
+        self.assertEqual([], uf.findMany([]), "Expected no roots for an empty batch")
+
+    def testValidation(self):
+        uf = UnionFind(["a", "b", "c"])
+
+        self.assertRaises(AssertionError, uf.union, "a", "z")
+        self.assertRaises(AssertionError, uf.union, "z", "a")
+        self.assertRaises(AssertionError, uf.getSize, "z")
+
+        trusted = UnionFind(["a", "b", "c"], validate=False)
+        trusted.union("a", "b")
+        self.assertEqual(2, trusted.getSize("b"), "Expected trusted mode to behave the same on valid input")
+
+    def testFromSizeMatchesGeneral(self):
+        rand = random.Random(1)
+        n = 300
+        general = UnionFind(list(range(n)))
+        dense = UnionFind.fromSize(n)
+
+        for _ in range(200):
+            x, y = rand.randrange(n), rand.randrange(n)
+            general.union(x, y)
+            dense.union(x, y)
+
+        self.assertEqual(general.getRoots(), dense.getRoots(), "Expected dense mode to pick the same representatives")
+        self.assertEqual(general.getRootSizes(), dense.getRootSizes(), "Expected dense mode to track the same set sizes")
+        for x in range(n):
+            self.assertEqual(general.find(x), dense.find(x))
+            self.assertEqual(general.getSize(x), dense.getSize(x))
+
+        xs = list(range(0, n-3, 7))
+        ys = [x+3 for x in xs]
+        general.unionMany(xs, ys)
+        dense.unionMany(xs, ys)
+        self.assertEqual(general.findMany(range(n)), dense.findMany(range(n)))
+
+    def testFindValidation(self):
+        for uf in (UnionFind(list(range(5))), UnionFind.fromSize(5)):
+            self.assertRaises(AssertionError, uf.find, -1)
+            self.assertRaises(AssertionError, uf.find, 5)
+            uf.freeze()
+            self.assertRaises(AssertionError, uf.find, -1)
+            self.assertEqual(1, uf.getSize(4))
+
+        # without validation, ids are trusted
+        self.assertEqual(4, UnionFind.fromSize(5, validate=False).find(4))
+
+    def testFromSizeValidation(self):
+        uf = UnionFind.fromSize(5)
+
+        self.assertRaises(AssertionError, uf.union, 0, 5)
+        self.assertRaises(AssertionError, uf.union, -1, 2)
+        self.assertRaises(AssertionError, uf.union, "1", 2)
+        self.assertRaises(AssertionError, uf.getSize, 2.0)
+        self.assertRaises(AssertionError, uf.unionMany, [0, -1], [1, 2])
+        self.assertRaises(AssertionError, uf.findMany, [0, 5])
+
+    def testAdd(self):
+        uf = UnionFind(["a", "b"])
+
+        uf.add("c")
+        self.assertEqual(set(["a", "b", "c"]), uf.getRoots(), "Expected added element to be its own root")
+
+        uf.union("a", "c")
+        uf.addMany(["d", 4, "f"])
+        uf.union("f", "c")
+        uf.add("g")
+
+        self.assertEqual(3, uf.getSize("a"), "Expected a, c and f to be in the same set")
+        self.assertEqual(uf.find("a"), uf.find("f"))
+        self.assertEqual(1, uf.getSize(4))
+        self.assertEqual(["d", "g"], uf.findMany(["d", "g"]))
+        self.assertEqual(5, len(uf.getRoots()))
+
+        self.assertRaises(AssertionError, uf.add, "a")
+        self.assertRaises(AssertionError, uf.addMany, ["h", "h"])
+        self.assertRaises(AssertionError, uf.addMany, ["h", "b"])
+        self.assertEqual(7, len(uf.elements), "Expected rejected adds to leave the datastructure unchanged")
+
+    def testAddDoesNotModifyInput(self):
+        elements = [1, 2, 3]
+        uf = UnionFind(elements)
+        uf.add(4)
+
+        self.assertEqual([1, 2, 3], elements, "Expected constructor input list to be left alone")
+
+    def testAddFromSize(self):
+        uf = UnionFind.fromSize(2)
+
+        uf.add(2)
+        uf.addMany([3, 4, 5])
+        uf.union(0, 5)
+        uf.union(2, 5)
+
+        self.assertEqual(3, uf.getSize(2))
+        self.assertEqual(4, len(uf.getRoots()))
+
+        self.assertRaises(AssertionError, uf.add, 7)
+        self.assertRaises(AssertionError, uf.addMany, [6, 8])
+        self.assertRaises(AssertionError, uf.union, 0, 6)
+
+    def testGetNumSets(self):
+        uf = UnionFind(["bye", "a", "80", "cat"])
+        self.assertEqual(4, uf.getNumSets(), "Expected every element to be its own set on init")
+
+        uf.union("bye", "cat")
+        uf.union("cat", "bye")
+        self.assertEqual(3, uf.getNumSets(), "Expected number of sets to only go down on a real merge")
+
+        uf.unionMany(["a", "80", "a"], ["80", "a", "bye"])
+        self.assertEqual(1, uf.getNumSets())
+
+        uf.add("dog")
+        uf.addMany(["x", "y"])
+        self.assertEqual(4, uf.getNumSets())
+
+        dense = UnionFind.fromSize(10)
+        dense.unionMany([0, 1, 2], [3, 4, 3])
+        self.assertEqual(7, dense.getNumSets())
+
+    def testIterRoots(self):
+        for uf in (UnionFind(list(range(6))), UnionFind.fromSize(6)):
+            uf.union(0, 1)
+            uf.union(2, 3)
+            uf.union(1, 3)
+
+            self.assertEqual(uf.getRoots(), set(uf.iterRoots()))
+            self.assertEqual(uf.getNumSets(), len(list(uf.iterRoots())))
+
+    def testGetRootSizesView(self):
+        for uf in (UnionFind(list(range(6))), UnionFind.fromSize(6)):
+            view = uf.getRootSizesView()
+            self.assertEqual(uf.getRootSizes(), dict(view))
+
+            uf.union(0, 1)
+            uf.union(2, 1)
+            root = uf.find(0)
+
+            self.assertEqual(uf.getRootSizes(), dict(view), "Expected view to reflect later unions")
+            self.assertEqual(4, len(view))
+            self.assertEqual(3, view[root])
+            self.assertTrue(5 in view)
+            for el in set([0, 1, 2]) - set([root]):
+                self.assertFalse(el in view, "Expected merged element {} to no longer be a root".format(el))
+            self.assertRaises(KeyError, view.__getitem__, 9)
+            self.assertRaises(KeyError, view.__getitem__, "0")
+            with self.assertRaises(TypeError):
+                view[root] = 1
+
+    def testGetMembers(self):
+        uf = UnionFind(["bye", "a", "80", "cat", "dog"])
+        self.assertEqual(["a"], uf.getMembers("a"), "Expected singleton set on init")
+
+        uf.union("a", "80")
+        uf.union("cat", "bye")
+        uf.unionMany(["80"], ["bye"])
+        uf.add("new")
+
+        self.assertEqual(set(["bye", "a", "80", "cat"]), set(uf.getMembers("cat")))
+        self.assertEqual(4, len(uf.getMembers("a")), "Expected each member to be listed once")
+        self.assertEqual(["dog"], uf.getMembers("dog"))
+        self.assertEqual(["new"], uf.getMembers("new"))
+        self.assertRaises(AssertionError, uf.getMembers, "z")
+
+    def testIterSetsMatchesFind(self):
+        rand = random.Random(2)
+        n = 200
+        for uf in (UnionFind(list(range(n))), UnionFind.fromSize(n)):
+            for _ in range(150):
+                uf.union(rand.randrange(n), rand.randrange(n))
+
+            groups = {}
+            for x in range(n):
+                groups.setdefault(uf.find(x), set()).add(x)
+
+            sets = list(uf.iterSets())
+            self.assertEqual(uf.getNumSets(), len(sets))
+            self.assertEqual(sorted(map(sorted, groups.values())), sorted(map(sorted, sets)), "Expected iterSets to partition elements the same way as find")
+            for members in sets:
+                self.assertEqual(len(members), uf.getSize(members[0]))
+
+    def testFromEdges(self):
+        edges = [("a", "b"), ("c", "d"), ("b", "d"), ("e", "f")]
+        uf = UnionFind.fromEdges(edges)
+
+        self.assertEqual(["a", "b", "c", "d", "e", "f"], uf.elements, "Expected elements in order of first appearance")
+        self.assertEqual(2, uf.getNumSets())
+        self.assertEqual(4, uf.getSize("c"))
+
+        uf = UnionFind.fromEdges(edges, elements=["a", "b", "c", "d", "e", "f", "g"])
+        self.assertEqual(3, uf.getNumSets(), "Expected elements without edges to stay singleton sets")
+
+        uf = UnionFind.fromEdges([], elements=range(3))
+        self.assertEqual(set([0, 1, 2]), uf.getRoots())
+
+    def testFromEdgesParallelMatchesSequential(self):
+        rand = random.Random(3)
+        n = 1000
+        # enough edges per element to use the workers, kept within blocks of 20 ids (and out of
+        #   the last 10 blocks) so that many sets remain
+        edges = []
+        for _ in range(8*n):
+            block = rand.randrange(40)
+            edges.append((20*block + rand.randrange(20), 20*block + rand.randrange(20)))
+
+        sequential = UnionFind.fromEdges(edges, elements=list(range(n)))
+        self.assertTrue(sequential.getNumSets() > 200)
+        for workers in (2, 3, 4):
+            for elements in (list(range(n)), range(n)):
+                parallel = UnionFind.fromEdges(edges, elements=elements, workers=workers)
+
+                self.assertEqual(sequential.getNumSets(), parallel.getNumSets())
+                self.assertEqual(sorted(map(sorted, sequential.iterSets())), sorted(map(sorted, parallel.iterSets())), "Expected parallel build to find the same sets")
+                for x in range(n):
+                    self.assertEqual(sequential.getSize(x), parallel.getSize(x))
+
+    def testCompactForests(self):
+        rand = random.Random(4)
+        n = 300
+        xs = [rand.randrange(n) for _ in range(200)]
+        ys = [rand.randrange(n) for _ in range(200)]
+        expected = UnionFind.fromSize(n)
+        expected.unionMany(xs, ys)
+
+        # compact two halves separately, merge them, then attach the result to singletons
+        first = _compactForest(xs[:100], ys[:100])
+        second = _compactForest(xs[100:], ys[100:])
+        children, roots = _mergeForests(first, second)
+        children = array('q', children)
+        roots = array('q', roots)
+        self.assertTrue(set(roots).isdisjoint(children), "Expected a flat forest")
+
+        for uf in (UnionFind(list(range(n))), UnionFind.fromSize(n)):
+            uf._attachFlat(children, roots)
+            self.assertEqual(expected.getNumSets(), uf.getNumSets())
+            self.assertEqual(sorted(map(sorted, expected.iterSets())), sorted(map(sorted, uf.iterSets())))
+            self.assertEqual(uf.getNumSets(), len(uf.getRoots()), "Expected the attached children to stop being roots")
+            self.assertEqual(sorted(expected.getRootSizes().values()), sorted(uf.getRootSizes().values()))
+
+    def testSaveLoad(self):
+        rand = random.Random(4)
+        n = 300
+        for original in (UnionFind(["e{}".format(i) for i in range(n)]), UnionFind.fromSize(n)):
+            elements = list(original.elements)
+            for _ in range(250):
+                original.union(rand.choice(elements), rand.choice(elements))
+
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "uf.bin")
+                original.save(path)
+
+                for useMmap in (True, False):
+                    loaded = UnionFind.load(path, useMmap=useMmap)
+
+                    self.assertEqual(elements, list(loaded.elements))
+                    self.assertEqual(original.getNumSets(), loaded.getNumSets())
+                    self.assertEqual(original.getRootSizes(), loaded.getRootSizes())
+                    self.assertEqual(original.findMany(elements), loaded.findMany(elements))
+                    self.assertEqual(sorted(map(sorted, original.iterSets())), sorted(map(sorted, loaded.iterSets())))
+
+                    new = n if type(loaded.map) is range else "new"
+                    loaded.add(new)
+                    loaded.union(elements[0], new)
+                    self.assertEqual(loaded.find(elements[0]), loaded.find(new), "Expected loaded datastructure to support adds and unions")
+                    self.assertEqual(original.getSize(elements[0]) + 1, loaded.getSize(new))
+
+    def testLoadTruncated(self):
+        uf = UnionFind(["a", "b", "c"])
+        uf.union("a", "c")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uf.bin")
+            uf.save(path)
+            with open(path, "rb") as f:
+                data = f.read()
+
+            # cut into the element table, the arrays, the header, and nothing left at all
+            for size in (len(data) - 1, 40, 10, 0):
+                with open(path, "wb") as f:
+                    f.write(data[:size])
+                for useMmap in (True, False):
+                    self.assertRaises(AssertionError, UnionFind.load, path, useMmap)
+
+    def testLoadDoesNotWriteFile(self):
+        uf = UnionFind.fromSize(64)
+        for i in range(63):
+            uf.union(i, i+1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uf.bin")
+            uf.save(path)
+            with open(path, "rb") as f:
+                before = f.read()
+
+            loaded = UnionFind.load(path)
+            for i in range(64):
+                loaded.find(i)
+            loaded.union(0, 63)
+
+            with open(path, "rb") as f:
+                self.assertEqual(before, f.read(), "Expected path compression on a memory mapped load to leave the file alone")
+
+    def testRollback(self):
+        uf = UnionFind(["a", "b", "c", "d"], rollback=True)
+
+        uf.union("a", "b")
+        snap = uf.snapshot()
+
+        uf.union("c", "d")
+        uf.union("b", "d")
+        uf.union("a", "c")
+        self.assertEqual(1, uf.getNumSets())
+        self.assertEqual(4, uf.getSize("d"))
+
+        uf.rollback(snap)
+        self.assertEqual(3, uf.getNumSets(), "Expected unions after the snapshot to be undone")
+        self.assertEqual(2, uf.getSize("a"))
+        self.assertEqual(uf.find("a"), uf.find("b"))
+        self.assertEqual(["c"], uf.getMembers("c"))
+        self.assertEqual(set(["c", "d", uf.find("a")]), uf.getRoots())
+
+        uf.rollback(0)
+        self.assertEqual(set(["a", "b", "c", "d"]), uf.getRoots())
+        self.assertRaises(AssertionError, uf.rollback, 1)
+        self.assertRaises(AssertionError, UnionFind(["a"]).snapshot)
+
+    def testRollbackMatchesRebuild(self):
+        rand = random.Random(5)
+        n = 100
+        for uf in (UnionFind(list(range(n)), rollback=True), UnionFind.fromSize(n, rollback=True)):
+            pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(150)]
+            snaps = []
+            for k in range(0, 150, 10):
+                snaps.append((k, uf.snapshot()))
+                xs, ys = zip(*pairs[k:k+10])
+                if k % 20:
+                    uf.unionMany(xs, ys)
+                else:
+                    for x, y in zip(xs, ys):
+                        uf.union(x, y)
+
+            for k, snap in reversed(snaps):
+                uf.rollback(snap)
+
+                rebuilt = UnionFind(list(range(n)))
+                for x, y in pairs[:k]:
+                    rebuilt.union(x, y)
+
+                self.assertEqual(rebuilt.getNumSets(), uf.getNumSets())
+                self.assertEqual(rebuilt.getRootSizes(), uf.getRootSizes(), "Expected rollback to restore the same representatives and sizes")
+                self.assertEqual(sorted(map(sorted, rebuilt.iterSets())), sorted(map(sorted, uf.iterSets())))
+
+    def testMetrics(self):
+        uf = UnionFind(["a", "b", "c", "d", "e"])
+        self.assertEqual(None, uf.getMetrics(), "Expected no metrics unless enabled")
+
+        uf.union("a", "b")
+        uf.union("c", "d")
+        uf.union("a", "c")
+        uf.enableMetrics()
+
+        # d hangs below c, below a -- two links, and compression re-points d straight at a
+        root = uf.find("d")
+        uf.union("b", "d")
+        uf.unionMany(["e", "e"], ["a", "b"])
+        uf.findMany(["a", "e"])
+
+        metrics = uf.getMetrics()
+        self.assertEqual(root, uf.find("e"))
+        self.assertEqual(1 + 2 + 4 + 2, metrics["finds"])
+        self.assertEqual({0: 3, 1: 5, 2: 1}, metrics["pathLengths"], "Expected only the find of d to walk two links")
+        self.assertEqual(1, metrics["pointersRewritten"])
+        self.assertEqual(1, metrics["unionsMerged"])
+        self.assertEqual(2, metrics["unionsJoined"])
+        self.assertEqual(1, metrics["numSets"])
+        self.assertEqual(5, metrics["largestSet"])
+        self.assertEqual({5: 1}, metrics["setSizes"])
+
+        # snapshots are copies
+        metrics["pathLengths"].clear()
+        self.assertNotEqual({}, uf.getMetrics()["pathLengths"])
+
+        uf.disableMetrics()
+        self.assertEqual(None, uf.getMetrics())
+        self.assertIs(UnionFind, type(uf))
+
+    def testMetricsMatchUninstrumented(self):
+        rand = random.Random(6)
+        n = 200
+        pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(300)]
+        for build in (lambda: UnionFind(list(range(n))), lambda: UnionFind.fromSize(n), lambda: UnionFind.fromSize(n, rollback=True)):
+            plain = build()
+            metered = build()
+            metered.enableMetrics()
+            for k in range(0, 300, 30):
+                xs, ys = zip(*pairs[k:k+30])
+                for uf in (plain, metered):
+                    if k % 60:
+                        uf.unionMany(xs, ys)
+                    else:
+                        for x, y in zip(xs, ys):
+                            uf.union(x, y)
+                self.assertEqual(plain.findMany(xs), metered.findMany(xs))
+                self.assertEqual(list(plain.parent), list(metered.parent), "Expected metrics to leave the forest unchanged")
+
+            metrics = metered.getMetrics()
+            self.assertEqual(300, metrics["unionsMerged"] + metrics["unionsJoined"])
+            self.assertEqual(n - metered.getNumSets(), metrics["unionsMerged"])
+            self.assertEqual(sum(metrics["pathLengths"].values()), metrics["finds"])
+            self.assertEqual(plain.getRootSizes(), metered.getRootSizes())
+            self.assertEqual(max(plain.getRootSizes().values()), metrics["largestSet"])
+            self.assertEqual(n, sum(size*k for size, k in metrics["setSizes"].items()))
+            if metered.history is not None:
+                self.assertEqual(0, metrics["pointersRewritten"], "Expected no compression in rollback mode")
+
+    def testSameSet(self):
+        uf = UnionFind(["a", "b", "c"])
+        uf.union("a", "b")
+        self.assertTrue(uf.sameSet("a", "b"))
+        self.assertTrue(uf.sameSet("c", "c"))
+        self.assertFalse(uf.sameSet("a", "c"))
+        self.assertRaises(AssertionError, uf.sameSet, "a", "d")
+
+    def testFreeze(self):
+        rand = random.Random(7)
+        n = 300
+        pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(250)]
+        for uf in (UnionFind(list(range(n))), UnionFind.fromSize(n), UnionFind.fromSize(n, rollback=True)):
+            for x, y in pairs:
+                uf.union(x, y)
+            expected = [uf.find(x) for x in range(n)]
+            root_sizes = uf.getRootSizes()
+            uf.enableMetrics()
+
+            uf.freeze()
+            self.assertTrue(all(uf.parent[uf.parent[i]] == uf.parent[i] for i in range(n)), "Expected every element to point directly at its root")
+            self.assertEqual(expected, [uf.find(x) for x in range(n)])
+            self.assertEqual(expected, uf.findMany(range(n)))
+            self.assertEqual(root_sizes, uf.getRootSizes())
+            self.assertEqual(root_sizes[expected[0]], uf.getSize(0))
+            self.assertEqual(None, uf.getMetrics(), "Expected freeze to stop metrics")
+            for x, y in pairs[:50]:
+                self.assertTrue(uf.sameSet(x, y))
+                self.assertEqual(expected[x] == expected[n-1-y], uf.sameSet(x, n-1-y))
+
+            self.assertRaises(AssertionError, uf.union, 0, 1)
+            self.assertRaises(AssertionError, uf.unionMany, [0], [1])
+            self.assertRaises(AssertionError, uf.add, n)
+            self.assertRaises(AssertionError, uf.snapshot)
+            self.assertRaises(AssertionError, uf.sameSet, 0, n)
+            self.assertRaises(TypeError, uf.parent.__setitem__, 0, 1)
+
+            # freezing twice changes nothing
+            uf.freeze()
+            self.assertEqual(expected, uf.findMany(range(n)))
+
+    def testFreezeLoaded(self):
+        uf = UnionFind.fromSize(64)
+        uf.unionMany(range(0, 63), range(1, 64))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uf.bin")
+            uf.save(path)
+
+            loaded = UnionFind.load(path)
+            loaded.freeze()
+            self.assertEqual(uf.findMany(range(64)), loaded.findMany(range(64)))
+            self.assertTrue(loaded.sameSet(0, 63))
+
+    def testFreezeSharedWithForkedWorkers(self):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("fork is not available")
+
+        global frozenUnionFind
+        frozenUnionFind = UnionFind.fromSize(1000)
+        frozenUnionFind.unionMany(range(0, 999, 2), range(1, 1000, 2))
+        frozenUnionFind.freeze()
+
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            results = pool.map(findInFrozen, [range(0, 500), range(500, 1000)])
+        self.assertEqual(frozenUnionFind.findMany(range(1000)), results[0] + results[1])
+
+    def testCompressionStrategies(self):
+        # each strategy leaves a different shape behind on the chain 0 -> 1 -> 2 -> 3 -> 4
+        for compression, expected in (("full", [4, 4, 4, 4, 4]), ("halving", [2, 2, 4, 4, 4]), ("splitting", [2, 3, 4, 4, 4])):
+            uf = UnionFind.fromSize(5, compression=compression)
+            uf.parent = array('q', [1, 2, 3, 4, 4])
+            self.assertEqual(4, uf.find(0))
+            self.assertEqual(expected, list(uf.parent), "Expected {} compression to leave {}".format(compression, expected))
+
+    def testStrategiesMatchDefault(self):
+        rand = random.Random(8)
+        n = 200
+        pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(300)]
+        expected = UnionFind(list(range(n)))
+        for x, y in pairs:
+            expected.union(x, y)
+
+        for compression in ("full", "halving", "splitting"):
+            for linking in ("size", "rank"):
+                for uf in (UnionFind(list(range(n)), compression=compression, linking=linking), UnionFind.fromSize(n, compression=compression, linking=linking)):
+                    for k in range(0, 300, 30):
+                        xs, ys = zip(*pairs[k:k+30])
+                        if k % 60:
+                            uf.unionMany(xs, ys)
+                        else:
+                            for x, y in zip(xs, ys):
+                                uf.union(x, y)
+
+                    self.assertEqual(expected.getNumSets(), uf.getNumSets())
+                    self.assertEqual(sorted(map(sorted, expected.iterSets())), sorted(map(sorted, uf.iterSets())), "Expected {}/{} to find the same sets".format(compression, linking))
+                    for x in range(0, n, 7):
+                        self.assertEqual(expected.getSize(x), uf.getSize(x))
+                        self.assertTrue(uf.sameSet(x, uf.find(x)))
+                    if linking == "size":
+                        self.assertEqual(expected.getRoots(), uf.getRoots(), "Expected linking by size to pick the same representatives")
+
+    def testRankRollback(self):
+        rand = random.Random(9)
+        n = 100
+        pairs = [(rand.randrange(n), rand.randrange(n)) for _ in range(150)]
+        uf = UnionFind.fromSize(n, rollback=True, linking="rank")
+        snaps = []
+        for k in range(0, 150, 10):
+            snaps.append((k, uf.snapshot(), list(uf.ranks)))
+            for x, y in pairs[k:k+10]:
+                uf.union(x, y)
+
+        for k, snap, ranks in reversed(snaps):
+            uf.rollback(snap)
+            self.assertEqual(ranks, list(uf.ranks), "Expected rollback to restore the ranks")
+            self.assertEqual(n - len(uf.history), uf.getNumSets())
+
+        uf.addMany([n, n+1])
+        self.assertEqual(n+2, len(uf.ranks))
+
+    def testStrategyValidation(self):
+        self.assertRaises(AssertionError, UnionFind, [1, 2], compression="none")
+        self.assertRaises(AssertionError, UnionFind.fromSize, 2, linking="height")
+
+"""
+Worker for testFreezeSharedWithForkedWorkers -- queries the frozen datastructure inherited from
+    the parent process
+
+:type xs: Iterable[int]
+:rtype: List[int]
+"""
+def findInFrozen(xs):
+    return [frozenUnionFind.find(x) for x in xs]
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
 
@@ -5,9 +5,30 @@ Do NOT run this file by hand -- instead run the "[path-to-dvs_structures]/dvs_st
 """
 
 from VEB import VEB
+import copy
+import pickle
+import random
 import unittest
 
 class VEBTests(unittest.TestCase):
+    """
+    Check that two VEBs have the same state at every level of recursion
+    """
+    def assertSameStructure(self, expected, actual):
+        self.assertEqual(expected.u, actual.u)
+        self.assertEqual(expected.min, actual.min)
+        self.assertEqual(expected.max, actual.max)
+        self.assertEqual(type(expected), type(actual))
+        if type(expected) is not VEB: # bitset leaf
+            self.assertEqual(expected.bits, actual.bits)
+            return
+        self.assertEqual(set(expected.cluster), set(actual.cluster))
+        for i in expected.cluster:
+            self.assertSameStructure(expected.cluster[i], actual.cluster[i])
+        self.assertEqual(expected.summary is None, actual.summary is None)
+        if expected.summary is not None:
+            self.assertSameStructure(expected.summary, actual.summary)
+
     def testSuccessor(self):
         veb = VEB(u=2**64)
 
@@ -87,6 +108,323 @@ class VEBTests(unittest.TestCase):
         self.assertEqual(veb.successor(12), -1, "Expected no successor of 12, return -1")
         self.assertEqual(veb.predecessor(40), -1, "Expected no predecessor of 12, return -1")
 
+    def testLargeUniverse(self):
+        for u in (2**64, 2**128, 2**256, 2**2048):
+            veb = VEB(u=u)
+
+            A = [0, 2**60 + 1, 2**62 + 3, u//2 - 1, u//2 + 5, u - 2, u - 1]
+            veb.insertAll(A)
+
+            for a, b in zip(A, A[1:]):
+                self.assertEqual(veb.successor(a), b, "Expected successor of {} to be {} for u = {}".format(a, b, u))
+                self.assertEqual(veb.predecessor(b), a, "Expected predecessor of {} to be {} for u = {}".format(b, a, u))
+            self.assertEqual(veb.successor(u - 1), -1)
+
+            veb.delete(u//2 + 5)
+            self.assertEqual(veb.successor(u//2 - 1), u - 2, "Expected successor to skip deleted element for u = {}".format(u))
+
+    def testRandomOperationsMatchSortedList(self):
+        rand = random.Random(0)
+        for u in (2, 4, 16, 256, 2**16):
+            veb = VEB(u=u)
+            present = set()
+
+            for _ in range(2000):
+                x = rand.randrange(u)
+                if rand.random() < 0.6:
+                    veb.insert(x)
+                    present.add(x)
+                else:
+                    veb.delete(x)
+                    present.discard(x)
+
+                q = rand.randrange(u)
+                larger = [y for y in present if y > q]
+                smaller = [y for y in present if y < q]
+                self.assertEqual(min(larger) if larger else -1, veb.successor(q), "Expected successor of {} to match for u = {}".format(q, u))
+                self.assertEqual(max(smaller) if smaller else -1, veb.predecessor(q), "Expected predecessor of {} to match for u = {}".format(q, u))
+
+    def testLeafSizesMatchSortedList(self):
+        rand = random.Random(3)
+        for u in (16, 2**16, 2**32):
+            for leafSize in (1, 2, 16, 64, 256, 2**16):
+                veb = VEB(u=u, leafSize=leafSize)
+                present = set()
+
+                for _ in range(1000):
+                    x = rand.randrange(u) if rand.random() < 0.5 else rand.randrange(min(u, 512))
+                    if rand.random() < 0.6:
+                        veb.insert(x)
+                        present.add(x)
+                    else:
+                        veb.delete(x)
+                        present.discard(x)
+
+                    q = rand.randrange(u) if rand.random() < 0.5 else rand.randrange(min(u, 512))
+                    larger = [y for y in present if y > q]
+                    smaller = [y for y in present if y < q]
+                    self.assertEqual(min(larger) if larger else -1, veb.successor(q), "Expected successor of {} to match for u = {}, leafSize = {}".format(q, u, leafSize))
+                    self.assertEqual(max(smaller) if smaller else -1, veb.predecessor(q), "Expected predecessor of {} to match for u = {}, leafSize = {}".format(q, u, leafSize))
+
+                self.assertEqual(sorted(present), list(veb), "Expected iteration to match for u = {}, leafSize = {}".format(u, leafSize))
+                self.assertEqual(sorted(present, reverse=True), list(reversed(veb)), "Expected reversed iteration to match for u = {}, leafSize = {}".format(u, leafSize))
+
+    def testBitsetLeaves(self):
+        veb = VEB(u=2**16, leafSize=256)
+        veb.insertAll([3, 300, 301, 65535])
+
+        cluster = veb.cluster[veb._high(300)]
+        self.assertNotEqual(VEB, type(cluster), "Expected clusters of 256 integers to be bitset leaves")
+        self.assertEqual((1 << 44) | (1 << 45), cluster.bits)
+
+        veb = VEB(u=2**32, leafSize=256)
+        veb.insertAll([3, 300])
+        self.assertEqual(VEB, type(veb.cluster[0]), "Expected clusters of 2^16 integers to stay recursive")
+
+        self.assertRaises(AssertionError, VEB, 16, 3)
+        self.assertRaises(AssertionError, VEB, 16, 0)
+        self.assertRaises(AssertionError, VEB, 16, "16")
+
+    def testPickleAndDeepCopy(self):
+        rand = random.Random(12)
+        keys = rand.sample(range(2**32), 500)
+        populated = VEB(u=2**32)
+        populated.insertAll(keys)
+        for veb in (VEB(16), VEB(), VEB(u=2**16, leafSize=1), populated, VEB.fromSorted(sorted(keys), u=2**32, leafSize=1)):
+            stored = list(veb)
+            for restored in (pickle.loads(pickle.dumps(veb)), copy.deepcopy(veb)):
+                self.assertEqual(stored, list(restored), "Expected the copy to hold the same integers")
+                self.assertEqual(len(veb), len(restored))
+
+                # the copy can be changed without touching the original
+                extra = [rand.randrange(veb.u) for _ in range(50)]
+                restored.insertAll(extra)
+                for x in stored[::2]:
+                    restored.delete(x)
+                self.assertEqual(sorted((set(stored) | set(extra)) - set(stored[::2])), list(restored))
+                self.assertEqual(stored, list(veb))
+
+    def testCompactNodes(self):
+        veb = VEB(u=2**64)
+        veb.insertAll([1, 2**40, 2**41])
+
+        self.assertFalse(hasattr(veb, "__dict__"), "Expected nodes to have no per-instance dict")
+        a, b = veb.cluster.values()
+        self.assertIs(a.level, b.level, "Expected clusters of one level to share their descriptor")
+        self.assertIs(a.level, veb.summary.level)
+        self.assertEqual(2**32, a.u)
+        self.assertIs(a.cluster, b.cluster, "Expected clusters holding a single element to share an empty cluster map")
+
+    def testLazyAllocation(self):
+        veb = VEB(u=2**64)
+        self.assertEqual(None, veb.summary, "Expected no summary on init")
+
+        veb.insert(2**40)
+        self.assertEqual(None, veb.summary, "Expected a single element to be kept in min/max alone")
+        self.assertEqual({}, veb.cluster)
+
+        veb.insert(7)
+        self.assertEqual(1, len(veb.cluster), "Expected only the cluster holding the second element to be created")
+        cluster = veb.cluster[veb._high(2**40)]
+        self.assertEqual(None, cluster.summary, "Expected the single element cluster to have no summary")
+        self.assertEqual({}, cluster.cluster)
+
+        veb.delete(7)
+        self.assertEqual(None, veb.summary, "Expected summary to be dropped once every cluster is empty")
+        self.assertEqual({}, veb.cluster)
+        self.assertEqual(2**40, veb.successor(0))
+
+        self.assertTrue("u: {}".format(2**64) in str(veb))
+
+    def testFromSortedMatchesInsertAll(self):
+        rand = random.Random(1)
+        for u in (2, 4, 16, 2**16, 2**32, 2**64):
+            for n in (0, 1, 2, 50, 1000):
+                for leafSize in (1, 16, 256):
+                    A = sorted(rand.randrange(u) for _ in range(n))
+
+                    expected = VEB(u=u, leafSize=leafSize)
+                    expected.insertAll(A)
+                    actual = VEB.fromSorted(A, u=u, leafSize=leafSize)
+
+                    self.assertSameStructure(expected, actual)
+
+    def testFromSortedValidation(self):
+        veb = VEB.fromSorted(iter([1, 3, 3, 8]), u=16)
+        self.assertEqual(veb.successor(1), 3)
+        self.assertEqual(veb.successor(3), 8, "Expected duplicates to be ignored")
+
+        self.assertRaises(AssertionError, VEB.fromSorted, [3, 1], 16)
+        self.assertRaises(AssertionError, VEB.fromSorted, [1, 16], 16)
+        self.assertRaises(AssertionError, VEB.fromSorted, [1, 2], 8)
+
+    def testBatchedQueriesMatchScalar(self):
+        rand = random.Random(2)
+        for u in (2, 4, 16, 256, 2**16, 2**32):
+            veb = VEB(u=u)
+            present = [rand.randrange(u) for _ in range(rand.randrange(0, 300))]
+            veb.insertAll(present)
+            for x in present[::3]:
+                veb.delete(x)
+
+            # spread out queries, and duplicate and clustered queries that share their descent
+            window = rand.randrange(min(u, 4096)) + 1
+            lo = rand.randrange(u - window + 1)
+            for xs in (sorted(rand.randrange(u) for _ in range(500)), sorted([lo + rand.randrange(window) for _ in range(500)] + [u - 1, u - 1])):
+                self.assertEqual([veb.successor(x) for x in xs], veb.successorMany(xs), "Expected batched successors to match for u = {}".format(u))
+                self.assertEqual([veb.predecessor(x) for x in xs], veb.predecessorMany(xs), "Expected batched predecessors to match for u = {}".format(u))
+
+        self.assertEqual(VEB(u=16).successorMany([]), [], "Expected no results for no queries")
+
+    def testBatchedQueriesValidation(self):
+        veb = VEB(u=16)
+        self.assertRaises(AssertionError, veb.successorMany, [3, 1])
+        self.assertRaises(AssertionError, veb.predecessorMany, [1, 16])
+        self.assertRaises(AssertionError, veb.successorMany, [1, "2"])
+        self.assertEqual(veb.successorMany(iter([1, 2])), [-1, -1], "Expected any iterable of queries to be accepted")
+
+    def testMembershipAndLen(self):
+        rand = random.Random(4)
+        for u in (2, 4, 16, 2**16):
+            for leafSize in (1, 256):
+                veb = VEB(u=u, leafSize=leafSize)
+                present = set()
+                self.assertEqual((0, -1, -1), (len(veb), veb.getMin(), veb.getMax()), "Expected empty structure to have no elements")
+
+                for _ in range(1000):
+                    # duplicate inserts and deletes of absent integers must not change the count
+                    x = rand.randrange(min(u, 64))
+                    if rand.random() < 0.5:
+                        veb.insert(x)
+                        present.add(x)
+                    else:
+                        veb.delete(x)
+                        present.discard(x)
+
+                    self.assertEqual(len(present), len(veb), "Expected len to match for u = {}, leafSize = {}".format(u, leafSize))
+                    self.assertEqual(min(present) if present else -1, veb.getMin())
+                    self.assertEqual(max(present) if present else -1, veb.getMax())
+                    q = rand.randrange(u)
+                    self.assertEqual(q in present, veb.member(q), "Expected membership of {} to match for u = {}, leafSize = {}".format(q, u, leafSize))
+                    self.assertEqual(q in present, q in veb)
+
+        veb = VEB.fromSorted([1, 2, 2, 9], u=16)
+        self.assertEqual(3, len(veb), "Expected fromSorted to count each integer once")
+        veb.insert(2)
+        veb.delete(3)
+        self.assertEqual(3, len(veb))
+        self.assertRaises(AssertionError, veb.member, 16)
+
+    def testIteration(self):
+        veb = VEB(u=2**16)
+        A = [0, 3, 255, 256, 4000, 65535]
+        veb.insertAll(reversed(A))
+
+        self.assertEqual(list(veb), A, "Expected iteration in increasing order")
+        self.assertEqual(list(reversed(veb)), A[::-1], "Expected reversed iteration in decreasing order")
+        self.assertEqual(list(VEB(u=16)), [], "Expected nothing to iterate over in empty structure")
+
+    def testRandomRangesMatchSortedList(self):
+        rand = random.Random(1)
+        for u in (2, 4, 16, 256, 2**16):
+            veb = VEB(u=u)
+            present = set(rand.randrange(u) for _ in range(rand.randrange(1, 300)))
+            veb.insertAll(present)
+            # deletes leave behind structure that iteration must skip over
+            for x in rand.sample(sorted(present), len(present) // 3):
+                veb.delete(x)
+                present.discard(x)
+
+            for _ in range(200):
+                lo = rand.randrange(u + 1)
+                hi = rand.randrange(u + 1)
+                expected = sorted(y for y in present if lo <= y < hi)
+                self.assertEqual(expected, list(veb.iterRange(lo, hi)), "Expected range [{}, {}) to match for u = {}".format(lo, hi, u))
+                self.assertEqual(expected[::-1], list(veb.iterRange(lo, hi, reverse=True)), "Expected reversed range [{}, {}) to match for u = {}".format(lo, hi, u))
+                self.assertEqual(len(expected), veb.countRange(lo, hi), "Expected count of range [{}, {}) to match for u = {}".format(lo, hi, u))
+
+    def testRangeValidation(self):
+        veb = VEB(u=16)
+        self.assertEqual(list(veb.iterRange(0, 16)), [], "Expected u to be a valid upper bound")
+        self.assertRaises(AssertionError, veb.iterRange, -1, 3)
+        self.assertRaises(AssertionError, veb.iterRange, 0, 17)
+        self.assertRaises(AssertionError, veb.countRange, "0", 3)
+
+    def testValidationOnlyAtEntry(self):
+        calls = []
+        validX = VEB._validX
+        def countingValidX(veb, x):
+            calls.append(x)
+            return validX(veb, x)
+
+        VEB._validX = countingValidX
+        try:
+            veb = VEB(u=2**64)
+            veb.insertAll([5, 2**40, 2**40 + 1])
+            self.assertEqual(2**40, veb.successor(5))
+            veb.delete(2**40)
+            self.assertEqual(5, len(calls), "Expected each integer to be checked once, not once per level")
+
+            del calls[:]
+            trusted = VEB(u=2**64, validate=False)
+            trusted.insertAll([5, 2**40, 2**40 + 1])
+            self.assertEqual(2**40, trusted.successor(5))
+            self.assertEqual(5, trusted.predecessor(2**40))
+            trusted.delete(2**40)
+            self.assertEqual([5, 2**40 + 1], list(trusted))
+            self.assertEqual([], calls, "Expected no checks with validate = False")
+        finally:
+            VEB._validX = validX
+
+        trusted = VEB.fromSorted([1, 2, 2, 3], u=16, validate=False)
+        self.assertEqual([1, 2, 3], list(trusted), "Expected duplicates to be ignored without validation")
+
+    def testStats(self):
+        veb = VEB(u=2**32)
+        veb.insertAll([1, 2, 2**20])
+        self.assertEqual(None, veb.getStats(), "Expected no statistics unless enabled")
+
+        events = []
+        veb.enableStats(lambda op, x, depth, created: events.append((op, x, depth, created)))
+        veb.insert(2**31)
+        self.assertEqual(2**20, veb.successor(3))
+        veb.delete(2**31)
+        self.assertTrue(2 in veb)
+
+        stats = veb.getStats()
+        self.assertEqual({"insert": 1, "successor": 1, "delete": 1, "member": 1}, stats["ops"])
+        self.assertEqual([1, 1, 0], stats["clustersCreated"], "Expected a new top level cluster, and a new cluster in the top level summary")
+        self.assertEqual(stats["clustersCreated"], stats["clustersDropped"], "Expected delete to drop what insert created")
+        self.assertEqual([0, 1, 0], stats["nodesCreated"])
+        self.assertEqual([0, 0, 1], stats["leavesCreated"])
+        self.assertEqual([("insert", 2**31, 2, 2), ("successor", 3, 2, 0), ("delete", 2**31, 2, 0), ("member", 2, 2, 0)], events)
+        self.assertEqual({2: 1}, stats["depths"]["successor"])
+
+        # snapshots are copies
+        stats["visits"][0] = -1
+        self.assertNotEqual(-1, veb.getStats()["visits"][0])
+
+        veb.disableStats()
+        self.assertEqual(None, veb.getStats())
+        self.assertIs(VEB, type(veb.cluster[0]), "Expected nodes to switch back to the uninstrumented class")
+        self.assertEqual([1, 2, 2**20], list(veb))
+
+    def testCensus(self):
+        veb = VEB(u=2**32)
+        self.assertEqual([{"u": 2**32, "nodes": 1, "leaves": 0, "clusters": 0, "summaries": 0}], veb.getCensus())
+
+        veb.insertAll([1, 2, 2**20, 2**20 + 1])
+        census = veb.getCensus()
+        self.assertEqual([2**32, 2**16, 2**8], [row["u"] for row in census])
+        self.assertEqual((1, 2, 1), (census[0]["nodes"], census[0]["clusters"], census[0]["summaries"]))
+        self.assertEqual(3, census[1]["nodes"], "Expected the top level summary and two clusters")
+        self.assertEqual(4, census[2]["leaves"], "Expected a cluster and a summary leaf under each node holding two integers")
+
+    def testInvalidU(self):
+        self.assertRaises(AssertionError, VEB, 2**3)
+        self.assertRaises(AssertionError, VEB, 2**32 + 1)
+        self.assertRaises(AssertionError, VEB, "16")
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
 
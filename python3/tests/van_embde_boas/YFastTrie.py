@@ -0,0 +1,328 @@
+"""
+Python implementation of Y-Fast-Trie datastructure. Solves the predecessor/successor problem
+    with the same interface as VEB, but in space linear in the number of stored integers.
+
+The integers are split into buckets of Theta(lg(u)) consecutive integers (each bucket a sorted
+    list), and each bucket is identified by a representative -- a lower bound of its integers.
+    Only the representatives are stored in an X-Fast-Trie (a hash table of prefixes for every
+    bit length), so the trie holds O(n / lg(u)) representatives with lg(u) prefixes each.
+
+For explanation of the following runtimes and space complexities, as well as
+    motivation for the DS and method implementations, see:
+        https://www.youtube.com/watch?v=hmReJCupbNU (final minutes)
+
+* Let u be the integer passed to the constructor of the YFastTrie
+* Let n be the number of integers currently in datastructure
+
+Runtimes:
+    - successor: O( lg(lg(u)) ) expected
+    - predecessor: O( lg(lg(u)) ) expected
+    - insert: O( lg(lg(u)) ) expected amortized
+    - delete: O( lg(lg(u)) ) expected amortized
+    * Buckets are Python lists, so adding to or removing from a bucket shifts O(lg(u)) pointers
+        with a single memmove instead of rebalancing an O(lg(lg(u))) BST
+
+Space:
+    - O(n)
+"""
+from bisect import bisect_left
+from bisect import bisect_right
+
+class YFastTrie(object):
+    """
+    Creates a new Y-Fast-Trie structure where each int is contained in the range
+        {0, 1, ... u-1}
+    :type u: int, such that u = 2^k where k is a POSITIVE integer
+                Examples of valid u:
+                    - u = 2
+                    - u = 1024 = 2^10
+                    - u = 2^64
+    """
+    def __init__(self, u=2**32):
+        validInput, err_msg = self._validU(u)
+        assert (validInput), err_msg
+
+        self.u = u
+
+        # number of bits in each integer
+        self.w = u.bit_length() - 1
+
+        # buckets are split once they hold more than 2w integers, and merged into their
+        #   predecessor once they hold fewer than w/4 (at least 1, so that for small w a
+        #   bucket other than bucket 0 is merged as soon as it empties)
+        self.maxBucket = 2*self.w
+        self.minBucket = max(1, self.w // 4)
+
+        # maps each representative to its bucket -- a sorted list of the integers in
+        #   [representative, next representative). Representative 0 always exists, so every
+        #   integer falls in some bucket. Only bucket 0 may be empty
+        self.buckets = {0: []}
+
+        # representatives in sorted order, as a doubly linked list
+        self.nextRep = {0: None}
+        self.prevRep = {0: None}
+
+        # self.levels[l] maps every l bit prefix of a representative to the smallest and largest
+        #   representative with that prefix
+        self.levels = [{} for _ in range(self.w + 1)]
+        for l in range(self.w + 1):
+            self.levels[l][0] = (0, 0)
+
+    """
+    Insert all integers in a list into the datastructure
+
+    :type A: List[int], where each int x in A has 0 <= x <= u-1
+    :rtype: void
+    """
+    def insertAll(self, A):
+        for a in A:
+            self.insert(a)
+
+    """
+    Obtain the smallest element (not including x) in the structure that is greater than x
+       - if the successor does not exist, return -1
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def successor(self, x):
+        validInput, err_msg = self._validX(x)
+        assert (validInput), err_msg
+
+        rep = self._repAtMost(x)
+        bucket = self.buckets[rep]
+
+        # check if successor exists in x's bucket
+        k = bisect_right(bucket, x)
+        if k < len(bucket):
+            return bucket[k]
+
+        # if not, it's the smallest integer in the next bucket (buckets other than 0 are never empty)
+        rep = self.nextRep[rep]
+        if rep is None:
+            return -1
+        return self.buckets[rep][0]
+
+    """
+    Obtain the largest element (not including x) in the structure that is smaller than x
+        - if the predecessor does not exist, return -1
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def predecessor(self, x):
+        validInput, err_msg = self._validX(x)
+        assert (validInput), err_msg
+
+        rep = self._repAtMost(x)
+        bucket = self.buckets[rep]
+
+        # check if predecessor exists in x's bucket
+        k = bisect_left(bucket, x)
+        if k > 0:
+            return bucket[k-1]
+
+        # if not, it's the largest integer in the previous bucket (which is only empty if it's
+        #   bucket 0, and then there are no smaller integers)
+        rep = self.prevRep[rep]
+        if rep is None or not self.buckets[rep]:
+            return -1
+        return self.buckets[rep][-1]
+
+    """
+    Insert a new integer x into the datastructure
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: void
+    """
+    def insert(self, x):
+        validInput, err_msg = self._validX(x)
+        assert (validInput), err_msg
+
+        rep = self._repAtMost(x)
+        bucket = self.buckets[rep]
+
+        # don't store duplicates
+        k = bisect_left(bucket, x)
+        if k < len(bucket) and bucket[k] == x:
+            return
+        bucket.insert(k, x)
+
+        # split overfull bucket in half, with the first integer of the upper half as the new
+        #   representative
+        if len(bucket) > self.maxBucket:
+            half = len(bucket) // 2
+            upper = bucket[half:]
+            del bucket[half:]
+            self.buckets[upper[0]] = upper
+            self._insertRep(upper[0])
+
+    """
+    Deletes an integer x from the datastructure. If x is not in the datastructure, then
+        does nothing
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: void
+    """
+    def delete(self, x):
+        validInput, err_msg = self._validX(x)
+        assert (validInput), err_msg
+
+        rep = self._repAtMost(x)
+        bucket = self.buckets[rep]
+
+        k = bisect_left(bucket, x)
+        if k == len(bucket) or bucket[k] != x:
+            return
+        del bucket[k]
+
+        # merge underfull bucket into the previous one (bucket 0 has none, so it can shrink freely)
+        if rep != 0 and len(bucket) < self.minBucket:
+            prev = self.prevRep[rep]
+            self.buckets[prev].extend(bucket)
+            del self.buckets[rep]
+            self._deleteRep(rep)
+
+            # merged bucket may be overfull, so split it again
+            merged = self.buckets[prev]
+            if len(merged) > self.maxBucket:
+                half = len(merged) // 2
+                upper = merged[half:]
+                del merged[half:]
+                self.buckets[upper[0]] = upper
+                self._insertRep(upper[0])
+
+    """
+    Obtain a representation of the Y-Fast-Trie
+    """
+    def __str__(self):
+        s = "u: {}\n".format(self.u)
+        rep = 0
+        while rep is not None:
+            s += "bucket {}: {}\n".format(rep, self.buckets[rep])
+            rep = self.nextRep[rep]
+        return s
+
+    """
+    Obtain the largest representative that is at most x, by binary searching for the longest
+        prefix of x in the X-Fast-Trie
+
+    :type x: int, where 0 <= x <= u-1
+    :rtype: int
+    """
+    def _repAtMost(self, x):
+        levels = self.levels
+        w = self.w
+        if x in levels[w]:
+            return x
+
+        # levels[lo] always contains x's prefix (level 0 holds the empty prefix of representative
+        #   0), and levels[hi] never does
+        lo = 0
+        hi = w
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if (x >> (w - mid)) in levels[mid]:
+                lo = mid
+            else:
+                hi = mid
+
+        # the longest matching prefix has exactly one child, and it's not on x's side
+        smallest, largest = levels[lo][x >> (w - lo)]
+        if (x >> (w - lo - 1)) & 1:
+            # x branches right, so every representative under the prefix is smaller than x
+            return largest
+        # x branches left, so every representative under the prefix is larger than x
+        return self.prevRep[smallest]
+
+    """
+    Add a new representative to the X-Fast-Trie
+
+    :type rep: int
+    :rtype: void
+    """
+    def _insertRep(self, rep):
+        # link into sorted order
+        prev = self._repAtMost(rep)
+        nxt = self.nextRep[prev]
+        self.nextRep[prev] = rep
+        self.prevRep[rep] = prev
+        self.nextRep[rep] = nxt
+        if nxt is not None:
+            self.prevRep[nxt] = rep
+
+        # update every prefix of rep
+        w = self.w
+        for l, level in enumerate(self.levels):
+            prefix = rep >> (w - l)
+            if prefix in level:
+                smallest, largest = level[prefix]
+                level[prefix] = (min(smallest, rep), max(largest, rep))
+            else:
+                level[prefix] = (rep, rep)
+
+    """
+    Remove a representative from the X-Fast-Trie
+
+    :type rep: int
+    :rtype: void
+    """
+    def _deleteRep(self, rep):
+        # unlink from sorted order
+        prev = self.prevRep.pop(rep)
+        nxt = self.nextRep.pop(rep)
+        self.nextRep[prev] = nxt
+        if nxt is not None:
+            self.prevRep[nxt] = prev
+
+        # update every prefix of rep -- its neighbours in sorted order replace it as the
+        #   smallest or largest representative, if they share the prefix
+        w = self.w
+        for l, level in enumerate(self.levels):
+            prefix = rep >> (w - l)
+            smallest, largest = level[prefix]
+            if smallest == rep and largest == rep:
+                del level[prefix]
+            elif smallest == rep:
+                level[prefix] = (nxt, largest)
+            elif largest == rep:
+                level[prefix] = (smallest, prev)
+
+    """
+    Check if u is an int where u = 2^k for some positive int k
+
+    :type u: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validU(self, u):
+        # check if u is an int
+        if type(u) is not int:
+            err_msg = "{} is not an integer".format(u)
+            return False, err_msg
+
+        # check if u is a power of 2, other than 1
+        if u < 2 or bin(u).count("1") != 1:
+            err_msg = "{} is not a power of 2 greater than 1".format(u)
+            return False, err_msg
+
+        # passed all checks
+        return True, ""
+
+    """
+    Check if x is an int in the range {0, 1, ... u-1}
+    :type x: Undefined
+    :rtype: bool, string -- where string is the error message if bool is False
+    """
+    def _validX(self, x):
+        # check if x is an int
+        if type(x) is not int:
+            err_msg = "{} is not an integer".format(x)
+            return False, err_msg
+
+        # check if x is in the valid range
+        if x < 0 or self.u <= x:
+            err_msg = "{} is not in the range 0...{}".format(x, self.u-1)
+            return False, err_msg
+
+        # passed all checks
+        return True, ""
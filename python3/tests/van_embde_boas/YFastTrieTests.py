@@ -0,0 +1,112 @@
+"""
+Test Suite for YFastTrie class.
+
+Do NOT run this file by hand -- instead run the "[path-to-dvs_structures]/dvs_structures/python3/tests/run_all.sh" script
+"""
+
+from YFastTrie import YFastTrie
+import random
+import unittest
+
+class YFastTrieTests(unittest.TestCase):
+    def testSuccessor(self):
+        trie = YFastTrie(u=2**64)
+
+        trie.insert(0)
+        trie.insert(2)
+        trie.insert(7)
+
+        self.assertEqual(trie.successor(0), 2, "Expected successor of 0 to be 2")
+        self.assertEqual(trie.successor(1), 2, "Expected successor of 1 to be 2")
+        self.assertEqual(trie.successor(2), 7, "Expected successor of 2 to be 7")
+        self.assertEqual(trie.successor(6), 7, "Expected successor of 6 to be 7")
+        self.assertEqual(trie.successor(7), -1, "Expected no successor of 7, return -1")
+        self.assertEqual(trie.successor(8), -1, "Expected no successor of 8, return -1")
+
+    def testPredecessor(self):
+        trie = YFastTrie(u=2**32)
+
+        trie.insert(0)
+        trie.insert(1000)
+        trie.insert(2000)
+
+        self.assertEqual(trie.predecessor(0), -1, "Expected no predecessor of 0, return -1")
+        self.assertEqual(trie.predecessor(1), 0, "Expected predecessor of 1 to be 0")
+        self.assertEqual(trie.predecessor(1000), 0, "Expected predecessor of 1000 to be 0")
+        self.assertEqual(trie.predecessor(1001), 1000, "Expected predecessor of 1001 to be 1000")
+        self.assertEqual(trie.predecessor(2000), 1000, "Expected predecessor of 2000 to be 1000")
+        self.assertEqual(trie.predecessor(2023391), 2000, "Expected predecessor of super large number to be maximum element")
+
+    def testInsertAllSuccessorPredecessor(self):
+        trie = YFastTrie(u=2**32)
+
+        A = list(range(0, 1000, 3))
+        trie.insertAll(A)
+
+        self.assertTrue(len(trie.buckets) > 1, "Expected enough elements to split buckets")
+        for a, b in zip(A, A[1:]):
+            self.assertEqual(trie.successor(a), b, "Expected successor of {} to be {}".format(a, b))
+            self.assertEqual(trie.predecessor(b), a, "Expected predecessor of {} to be {}".format(b, a))
+
+    def testDelete(self):
+        trie = YFastTrie(u=2**32)
+
+        trie.insert(38)
+
+        # deleting a number that doesn't exist should not crash the DS
+        trie.delete(80)
+
+        self.assertEqual(trie.successor(12), 38, "Expected successor of 12 to be 38")
+        self.assertEqual(trie.predecessor(40), 38, "Expected predecessor of 40 to be 38")
+
+        trie.delete(38)
+
+        self.assertEqual(trie.successor(12), -1, "Expected no successor of 12, return -1")
+        self.assertEqual(trie.predecessor(40), -1, "Expected no predecessor of 40, return -1")
+
+    def testRandomOperationsMatchSortedList(self):
+        rand = random.Random(0)
+        for u, span in ((2, 2), (8, 8), (16, 16), (2**16, 2**16), (2**64, 2**64), (2**64, 3000)):
+            trie = YFastTrie(u=u)
+            present = set()
+
+            for step in range(3000):
+                x = rand.randrange(span)
+                # insert-heavy first half, delete-heavy second half, to exercise splits and merges
+                if rand.random() < (0.7 if step < 1500 else 0.3):
+                    trie.insert(x)
+                    present.add(x)
+                else:
+                    trie.delete(x)
+                    present.discard(x)
+
+                q = rand.randrange(span)
+                larger = [y for y in present if y > q]
+                smaller = [y for y in present if y < q]
+                self.assertEqual(min(larger) if larger else -1, trie.successor(q), "Expected successor of {} to match for u = {}".format(q, u))
+                self.assertEqual(max(smaller) if smaller else -1, trie.predecessor(q), "Expected predecessor of {} to match for u = {}".format(q, u))
+
+            stored = sorted(y for bucket in trie.buckets.values() for y in bucket)
+            self.assertEqual(sorted(present), stored, "Expected buckets to hold exactly the stored integers")
+
+    def testSmallUniverseEmptiedBucket(self):
+        trie = YFastTrie(u=8)
+        trie.insertAll(range(7))
+        for x in range(3, 7):
+            trie.delete(x)
+
+        self.assertEqual(trie.successor(2), -1, "Expected no successor of 2, return -1")
+        self.assertEqual(trie.predecessor(7), 2, "Expected predecessor of 7 to be 2")
+        self.assertTrue(all(bucket for rep, bucket in trie.buckets.items() if rep != 0), "Expected only bucket 0 to be allowed to be empty")
+
+    def testInvalidInput(self):
+        self.assertRaises(AssertionError, YFastTrie, 1)
+        self.assertRaises(AssertionError, YFastTrie, 2**32 + 1)
+
+        trie = YFastTrie(u=16)
+        self.assertRaises(AssertionError, trie.insert, 16)
+        self.assertRaises(AssertionError, trie.successor, -1)
+        self.assertRaises(AssertionError, trie.predecessor, "3")
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)